@@ -0,0 +1,89 @@
+"""Per-execution latency and import time of the code execution backends.
+
+Each backend is measured cold (no prelude) and warm (sandbox_prelude.py run
+once per session). Import time is only reported by the jupyter backend.
+
+Usage (from code_exec/, with .env and fetch/.env in place):
+    python bench_executors.py [codebox] [jupyter] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from decouple import config
+
+assert os.path.isfile(".env"), ".env file not found!"
+os.environ["CODEBOX_API_KEY"] = config("CODEBOX_API_KEY")
+
+from executors import create_executor, load_prelude
+
+SNIPPETS = {
+    "print": "print(sum(range(1000)))",
+    "generated": (
+        "import matplotlib.pyplot as plt\n"
+        "import pandas as pd\n"
+        "from LSFetcher import LSFetcher\n"
+        "print(pd.DataFrame({'a': range(1000)}).describe())"
+    ),
+    "plot": (
+        "import matplotlib.pyplot as plt\n"
+        "plt.plot(range(100), [i * i for i in range(100)])\n"
+        "plt.title('bench')\n"
+        "plt.show()"
+    ),
+}
+
+PRELUDES = {
+    "cold": "",
+    "warm": load_prelude("./sandbox_prelude.py"),
+}
+
+
+def bench(backend: str, mode: str, runs: int):
+    executor = create_executor(
+        backend, pool_size=1, checkout_timeout=300, health_check_interval=300, prelude=PRELUDES[mode]
+    )
+
+    start_time = time.time()
+    executor.start()
+    print(f"[{backend}/{mode}] pool warm-up: {time.time() - start_time:.3f}s")
+
+    try:
+        for name, code in SNIPPETS.items():
+            latencies, import_times = [], []
+            for _ in range(runs):
+                # 직전 세션의 재시작이 끝날 때까지 기다려 실행 시간만 측정
+                while executor.pool.stats()["idle"] == 0:
+                    time.sleep(0.05)
+
+                timed_before = executor.timed_executions
+                import_before = executor.import_seconds
+                start_time = time.perf_counter()
+                result = executor.run(code)
+                latencies.append(time.perf_counter() - start_time)
+                if executor.timed_executions > timed_before:
+                    import_times.append(executor.import_seconds - import_before)
+
+            latencies.sort()
+            import_time = f"{statistics.mean(import_times):.3f}s" if import_times else "n/a"
+            print(
+                f"[{backend}/{mode}] {name:<9} type={result.type:<10} "
+                f"mean={statistics.mean(latencies):.3f}s "
+                f"p50={latencies[len(latencies) // 2]:.3f}s "
+                f"p95={latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]:.3f}s "
+                f"import={import_time}"
+            )
+    finally:
+        executor.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("backends", nargs="*", default=["codebox", "jupyter"])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        for mode in PRELUDES:
+            bench(backend, mode, args.runs)
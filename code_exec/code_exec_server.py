@@ -1,44 +1,179 @@
+import asyncio
+import json
 import logging
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from codeboxapi import CodeBox
 from decouple import config
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 assert os.path.isfile(".env"), ".env file not found!"
 os.environ["CODEBOX_API_KEY"] = config("CODEBOX_API_KEY")
 
-session_id = None
+from executors import create_executor, done_event, load_prelude, result_events
+from result_cache import ResultCache
+from session_pool import PoolExhausted
+
+# 실행 백엔드: codebox (원격 CodeBox) 또는 jupyter (로컬 커널)
+EXECUTOR_BACKEND = config("EXECUTOR_BACKEND", default="codebox")
+
+# 워커(프로세스)마다 미리 띄워 둘 세션 수, 세션 대기 제한 시간 및 상태 확인 간격 (초)
+# 두 백엔드 모두에 적용되므로 EXECUTOR_* 이름을 사용 (기존 CODEBOX_* 이름도 계속 인식)
+EXECUTOR_POOL_SIZE = config("EXECUTOR_POOL_SIZE", default=config("CODEBOX_POOL_SIZE", default=2, cast=int), cast=int)
+EXECUTOR_CHECKOUT_TIMEOUT = config(
+    "EXECUTOR_CHECKOUT_TIMEOUT", default=config("CODEBOX_CHECKOUT_TIMEOUT", default=60.0, cast=float), cast=float
+)
+EXECUTOR_HEALTH_CHECK_INTERVAL = config(
+    "EXECUTOR_HEALTH_CHECK_INTERVAL", default=config("CODEBOX_HEALTH_CHECK_INTERVAL", default=30.0, cast=float), cast=float
+)
+
+# 세션마다 한 번 미리 실행해 둘 코드 (import, 폰트, LSFetcher 인증)
+EXECUTOR_PRELUDE_FILE = config("EXECUTOR_PRELUDE_FILE", default="./sandbox_prelude.py")
+
+code_executor = create_executor(
+    EXECUTOR_BACKEND,
+    pool_size=EXECUTOR_POOL_SIZE,
+    checkout_timeout=EXECUTOR_CHECKOUT_TIMEOUT,
+    health_check_interval=EXECUTOR_HEALTH_CHECK_INTERVAL,
+    prelude=load_prelude(EXECUTOR_PRELUDE_FILE),
+)
+
+# 동시에 실행할 코드 수 및 요청당 실행 제한 시간 (초)
+EXECUTE_CONCURRENCY = config("EXECUTE_CONCURRENCY", default=EXECUTOR_POOL_SIZE, cast=int)
+EXECUTE_TIMEOUT = config("EXECUTE_TIMEOUT", default=120.0, cast=float)
+
+# 실행 백엔드 호출은 blocking이므로 이벤트 루프 밖의 스레드에서 실행
+thread_pool = ThreadPoolExecutor(max_workers=EXECUTE_CONCURRENCY, thread_name_prefix="executor")
+# 같은 코드의 실행 결과 캐시 (실시간 조회 코드는 제외)
+result_cache = ResultCache(
+    max_bytes=config("RESULT_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int),
+    max_entry_bytes=config("RESULT_CACHE_MAX_ENTRY_BYTES", default=8 * 1024 * 1024, cast=int),
+    ttl=config("RESULT_CACHE_TTL", default=3600.0, cast=float),
+    intraday_seconds=config("RESULT_CACHE_INTRADAY_EPOCH", default=300, cast=int),
+)
+
+execute_semaphore = asyncio.Semaphore(EXECUTE_CONCURRENCY)
+# abandoned: 시간 초과로 응답은 끝났지만 스레드에서 아직 실행 중인 수 (running에 포함)
+execute_stats = {"queued": 0, "running": 0, "abandoned": 0, "completed": 0, "failed": 0, "timed_out": 0}
 
 app = FastAPI()
 
 @app.on_event("startup")
 def startup_event():
-    start_codebox()
-
-def start_codebox():
-    global session_id
-
-    codebox = CodeBox()
-    codebox.start()
-
-    with open("./fetch/LSFetcher.py", "r") as f:
-        raw_python_file = f.read()
-    codebox.upload("LSFetcher.py", raw_python_file)
-
-    with open("./fetch/BaseFetcher.py", "r") as f:
-        raw_base_file = f.read()
-    codebox.upload("BaseFetcher.py", raw_base_file)
+    code_executor.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    code_executor.close()
+    thread_pool.shutdown(wait=False, cancel_futures=True)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "executor": code_executor.stats(),
+        "execute": execute_stats,
+        "result_cache": result_cache.stats(),
+    }
+
+@app.get("/pool")
+async def pool_stats():
+    # 기존 호출자 호환용 (전체 지표는 /metrics)
+    return code_executor.stats()["pool"]
+
+async def start_execution(code: str, abandoned: threading.Event, on_output=None) -> asyncio.Future:
+    """Wait for a free slot, then run ``code`` in the thread pool.
+
+    The slot is held until the thread finishes, not until the caller stops
+    waiting: a timed-out run keeps its thread busy, so releasing early would
+    let more work pile up in the thread pool than EXECUTE_CONCURRENCY allows.
+    ``abandon`` interrupts the run so the thread, and the slot, are freed.
+    Callers must not cancel the returned future (use ``asyncio.shield``).
+    """
+    # 동시 실행 수 제한, 대기 중인 요청 수는 queued로 노출
+    execute_stats["queued"] += 1
+    try:
+        await execute_semaphore.acquire()
+    finally:
+        execute_stats["queued"] -= 1
+
+    execute_stats["running"] += 1
+
+    def release(_):
+        execute_stats["running"] -= 1
+        if abandoned.is_set():
+            execute_stats["abandoned"] -= 1
+        execute_semaphore.release()
+
+    future = asyncio.get_running_loop().run_in_executor(thread_pool, run_code, code, abandoned, on_output)
+    future.add_done_callback(release)
+    return future
+
+def abandon(abandoned: threading.Event):
+    abandoned.set()
+    execute_stats["timed_out"] += 1
+    execute_stats["abandoned"] += 1
+    # 실행 중인 코드를 중단시켜 스레드와 슬롯이 풀리게 함 (무한 루프 등)
+    code_executor.interrupt(abandoned)
+
+def run_code(code: str, abandoned: threading.Event, on_output=None):
+    logging.warning(code_executor.stats())
+
+    execution_start_time = time.time()
+    print(f"Executing code with {code_executor.name}")
+    result = code_executor.run(code, abandoned, on_output)
+    execution_duration = time.time() - execution_start_time
+    print("Code executed successfully in", execution_duration, "seconds")
+    return result
+
+async def stream_execution(code: str):
+    """NDJSON events: stdout/error/image as they happen, then one done event with the final result.
+
+    The done event's ``realtime`` flag tells the llm service whether the
+    code read real-time data, so its response cache can use a short TTL.
+    """
+    realtime = result_cache.should_bypass(code)
+    if (cached := result_cache.get(code)) is not None:
+        for event in result_events(cached):
+            yield json.dumps(event) + "\n"
+        yield json.dumps(done_event(cached, cached=True, realtime=realtime)) + "\n"
+        return
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def on_output(event):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    abandoned = threading.Event()
+    future = await start_execution(code, abandoned, on_output)
+    deadline = loop.time() + EXECUTE_TIMEOUT
+    # 실행이 끝나면 (성공/실패 모두) None으로 스트림 종료를 알림
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
 
-    with open("./fetch/.env", "r") as f:
-        env_file = f.read()
-    codebox.upload(".env", env_file)
+    try:
+        while (event := await asyncio.wait_for(events.get(), timeout=deadline - loop.time())) is not None:
+            yield json.dumps(event) + "\n"
+    except asyncio.TimeoutError:
+        abandon(abandoned)
+        yield json.dumps({"type": "error", "text": f"Execution timed out after {EXECUTE_TIMEOUT} seconds"}) + "\n"
+        yield json.dumps(done_event(None, realtime=realtime)) + "\n"
+        return
 
-    codebox.install("httpx")
-    codebox.install("python-decouple")
+    try:
+        result = future.result()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        execute_stats["failed"] += 1
+        yield json.dumps({"type": "error", "text": str(e)}) + "\n"
+        yield json.dumps(done_event(None, realtime=realtime)) + "\n"
+        return
 
-    session_id = codebox.session_id
+    execute_stats["completed"] += 1
+    result_cache.put(code, result)
+    yield json.dumps(done_event(result, realtime=realtime)) + "\n"
 
 @app.post("/execute")
 async def execute_code(request: Request):
@@ -52,24 +187,48 @@ async def execute_code(request: Request):
         print("Deserialization Time:", time.time() - start_time)
         print("Code extracted successfully")
 
-        # Restore session
-        codebox = CodeBox.from_id(session_id)
-        if not codebox.list_files():
-            start_codebox()
-            codebox = CodeBox.from_id(session_id)
-        logging.warning(codebox.list_files())
-
-        execution_start_time = time.time()
-        print("Executing code with CodeBox")
-        result = codebox.run(code)
-        execution_duration = time.time() - execution_start_time
-        print("Code executed successfully in", execution_duration, "seconds")
+        # 빈 코드는 세션을 빌리기 전에 거절 (CodeBox는 ValueError를 내고 세션이 폐기됨)
+        if not isinstance(code, str) or not code.strip():
+            raise HTTPException(status_code=400, detail="No code to execute")
+
+        # stream=true 이면 실행 출력을 NDJSON 이벤트로 바로바로 전달
+        if body.get("stream", False):
+            return StreamingResponse(stream_execution(code), media_type="application/x-ndjson")
+
+        if (cached := result_cache.get(code)) is not None:
+            print("Returning cached execution result")
+            return {"result": cached.content, "type": cached.type}
+
+        abandoned = threading.Event()
+        future = await start_execution(code, abandoned)
+        try:
+            # shield: 시간 초과 시 future가 취소되면 스레드가 끝나기 전에 슬롯이 반환됨
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=EXECUTE_TIMEOUT)
+        except asyncio.TimeoutError:
+            abandon(abandoned)
+            raise HTTPException(status_code=504, detail=f"Execution timed out after {EXECUTE_TIMEOUT} seconds")
+        except ValueError:
+            raise
+        except Exception:
+            execute_stats["failed"] += 1
+            raise
+        execute_stats["completed"] += 1
+        result_cache.put(code, result)
 
         total_time = time.time() - start_time
         print("Total time taken to process the request:", total_time, "seconds")
 
-        return {"result": result.content}
+        return {"result": result.content, "type": result.type}
 
+    except HTTPException:
+        raise
+    except PoolExhausted as e:
+        print(f"An error occurred: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        # 잘못된 요청 본문/코드
+        print(f"An error occurred: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"An error occurred: {e}")
         raise HTTPException(status_code=500, detail=str(e))
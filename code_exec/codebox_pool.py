@@ -0,0 +1,44 @@
+from codeboxapi import CodeBox
+
+from session_pool import SessionPool
+
+# 샌드박스에 업로드할 fetch 모듈
+FETCH_FILES = ("LSFetcher.py", "BaseFetcher.py", "ChartStore.py")
+SANDBOX_PACKAGES = ("httpx", "python-decouple")
+
+
+class CodeBoxPool(SessionPool):
+    """Pre-warmed remote CodeBox sandboxes with the fetch modules, ``.env`` and packages in place."""
+
+    def create_session(self) -> CodeBox:
+        codebox = CodeBox()
+        codebox.start()
+
+        for file_name in FETCH_FILES:
+            with open(f"./fetch/{file_name}", "r") as f:
+                codebox.upload(file_name, f.read())
+
+        with open("./fetch/.env", "r") as f:
+            codebox.upload(".env", f.read())
+
+        for package in SANDBOX_PACKAGES:
+            codebox.install(package)
+
+        return codebox
+
+    def is_healthy(self, codebox: CodeBox) -> bool:
+        try:
+            return bool(codebox.list_files())
+        except Exception as e:
+            print(f"Health check failed for {codebox.session_id}: {e}")
+            return False
+
+    def reset_session(self, codebox: CodeBox):
+        codebox.restart()
+
+    def stop_session(self, codebox: CodeBox):
+        codebox.stop()
+
+    def interrupt_session(self, codebox: CodeBox):
+        # CodeBox API에는 실행 중단이 없으므로 커널을 재시작해 실행 중인 코드를 끝냄
+        codebox.restart()
@@ -0,0 +1,168 @@
+import threading
+
+from codebox_pool import CodeBoxPool
+from session_pool import SessionPool
+
+
+def result_events(result) -> list:
+    """Stream events for a finished ``CodeBoxOutput`` (backends that cannot stream)."""
+    if result.type.startswith("image/"):
+        return [{"type": "image", "mime": result.type, "data": result.content}]
+    if result.type == "error":
+        return [{"type": "error", "text": result.content}]
+    return [{"type": "stdout", "text": result.content}] if result.content else []
+
+
+def done_event(result, **extra) -> dict:
+    """Final stream event. Image payloads were already sent as image events, so they are not repeated."""
+    if result is None:
+        return {"type": "done", "result_type": "error", "result": None, **extra}
+    content = None if result.type.startswith("image/") else result.content
+    return {"type": "done", "result_type": result.type, "result": content, **extra}
+
+
+class BaseExecutor:
+    """Runs generated code and returns a ``CodeBoxOutput``-like result (``type``, ``content``)."""
+
+    name = "base"
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def run(self, code: str, abandoned: threading.Event = None, on_output=None):
+        """Run ``code``. ``abandoned`` is set when the caller gave up waiting (timeout).
+
+        ``on_output(event)`` receives stdout, error and image events as they
+        happen on backends that can stream, or once at the end otherwise.
+        """
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def interrupt(self, abandoned: threading.Event) -> bool:
+        """Stop the run started with ``abandoned``; returns False if nothing was running."""
+        return False
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class PooledExecutor(BaseExecutor):
+    """Executor that borrows one pre-warmed session from a ``SessionPool`` per run."""
+
+    def __init__(self, name: str, pool: SessionPool):
+        self.name = name
+        self.pool = pool
+        self.executions = 0
+        self.import_seconds = 0.0  # import 시간이 측정된 실행들의 합계
+        self.timed_executions = 0
+        self.interrupted = 0
+        self._running = {}  # abandoned 이벤트 -> 실행 중인 세션
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.pool.start()
+
+    def close(self):
+        self.pool.close()
+
+    def run(self, code: str, abandoned: threading.Event = None, on_output=None):
+        # 요청마다 미리 준비된 세션을 하나 빌려서 사용
+        session = self.pool.checkout()
+
+        if abandoned is not None:
+            with self._lock:
+                started = not abandoned.is_set()
+                if started:
+                    self._running[abandoned] = session
+            if not started:
+                # 세션을 기다리는 동안 시간 초과됨: 실행하지 않고 세션을 돌려줌
+                self.pool.release(session)
+                raise TimeoutError("Execution was abandoned before it started")
+
+        broken = False
+        try:
+            if on_output is not None and getattr(session, "supports_streaming", False):
+                result = session.run(code, on_output=on_output)
+            else:
+                result = session.run(code)
+                if on_output is not None:
+                    for event in result_events(result):
+                        on_output(event)
+
+            self.executions += 1
+            import_seconds = getattr(session, "last_import_seconds", None)
+            if import_seconds is not None:
+                self.import_seconds += import_seconds
+                self.timed_executions += 1
+                print(f"Import time of this execution: {import_seconds} seconds")
+            return result
+        except ValueError:
+            # 잘못된 입력 (빈 코드 등)은 세션 문제가 아니므로 그대로 반환
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if abandoned is not None:
+                with self._lock:
+                    self._running.pop(abandoned, None)
+            # 제한 시간을 넘긴 세션은 상태를 알 수 없으므로 폐기
+            abandoned_run = abandoned is not None and abandoned.is_set()
+            self.pool.release(session, broken=broken or abandoned_run)
+
+    def interrupt(self, abandoned: threading.Event) -> bool:
+        with self._lock:
+            session = self._running.get(abandoned)
+        if session is None:
+            return False
+        self.interrupted += 1
+        # CodeBox 재시작은 네트워크 호출이므로 이벤트 루프 밖에서 실행
+        threading.Thread(target=self.pool.interrupt, args=(session,), daemon=True).start()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "pool": self.pool.stats(),
+            "executions": self.executions,
+            "interrupted": self.interrupted,
+            "mean_import_seconds": (
+                self.import_seconds / self.timed_executions if self.timed_executions else None
+            ),
+        }
+
+
+def load_prelude(path: str) -> str:
+    """Read the warm-up prelude run once per session; an empty path disables it."""
+    if not path:
+        return ""
+    with open(path, "r") as f:
+        return f.read()
+
+
+def create_executor(
+    backend: str,
+    pool_size: int,
+    checkout_timeout: float,
+    health_check_interval: float,
+    prelude: str = "",
+) -> BaseExecutor:
+    """Build the executor selected by ``EXECUTOR_BACKEND`` ("codebox" or "jupyter")."""
+    pool_options = dict(
+        size=pool_size,
+        checkout_timeout=checkout_timeout,
+        health_check_interval=health_check_interval,
+        prelude=prelude,
+    )
+
+    if backend == "codebox":
+        return PooledExecutor("codebox", CodeBoxPool(**pool_options))
+    if backend == "jupyter":
+        # jupyter_client는 로컬 백엔드를 쓸 때만 필요
+        from kernel_pool import KernelPool
+
+        return PooledExecutor("jupyter", KernelPool(**pool_options))
+
+    raise ValueError(f"Unknown executor backend: {backend}")
@@ -5,17 +5,24 @@ class BaseFetcher:
     def __init__(self, api_key):
         self.api_key = api_key
 
-    async def fetch_data(self, url):
-        """Fetch data asynchronously from the given URL."""
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url)
-                response.raise_for_status()  # Raise an error for bad responses
-                return response.json()  # Assuming API returns JSON data
-            except httpx.HTTPStatusError as e:
-                print(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
-            except Exception as e:
-                print(f"An error occurred: {e}")
+    async def fetch_data(self, url, method="GET", headers=None, body=None, client=None):
+        """Fetch data asynchronously from the given URL.
+
+        Pass ``client`` to reuse an existing ``httpx.AsyncClient`` (and its
+        connection pool) across many calls.
+        """
+        if client is None:
+            async with httpx.AsyncClient() as client:
+                return await self.fetch_data(url, method, headers, body, client)
+
+        try:
+            response = await client.request(method, url, headers=headers, content=body)
+            response.raise_for_status()  # Raise an error for bad responses
+            return response.json()  # Assuming API returns JSON data
+        except httpx.HTTPStatusError as e:
+            print(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            print(f"An error occurred: {e}")
 
         return None  # Return None if there was an error
 
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+KST = timezone(timedelta(hours=9))
+
+# t8412OutBlock1 컬럼 순서 (모두 int64로 저장)
+COLUMNS = ("date", "time", "open", "high", "low", "close", "jdiff_vol", "value")
+
+# 이 시각 이후에 받은 봉은 그날 종가까지 확정된 것으로 봄 (15:30 장 마감 + 여유)
+CLOSE_TIME = (15, 40)
+
+
+def today() -> str:
+    return datetime.now(KST).strftime("%Y%m%d")
+
+
+def shift_date(date: str, days: int) -> str:
+    return (datetime.strptime(date, "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d")
+
+
+def closed_at(date: str) -> float:
+    """Epoch seconds after which the bars of ``date`` no longer change."""
+    close = datetime.strptime(date, "%Y%m%d").replace(hour=CLOSE_TIME[0], minute=CLOSE_TIME[1], tzinfo=KST)
+    return close.timestamp()
+
+
+def to_int(value) -> int:
+    # 거래가 없는 봉 등 빈 필드는 0으로 저장
+    value = str(value).strip()
+    return int(value) if value else 0
+
+
+class ChartStore:
+    """On-disk OHLCV cache for ``t8412`` bars, one memory-mapped ``.npy`` per shcode/ncnt.
+
+    Each file holds an ``(n, 8)`` int64 array sorted by date/time next to a small
+    JSON file recording the date range already fetched from LS. A query only
+    fetches the part of ``[sdate, edate]`` outside that range. The last stored
+    day is fetched again only if it was captured before that day's close, and
+    then at most once per ``tail_ttl`` seconds. An empty ``sdate`` means
+    ``default_days`` before ``edate``, so a first call never pages through
+    the whole history. Only the requested slice of the memory map is copied
+    into the returned DataFrame, which callers may modify freely.
+    """
+
+    def __init__(self, path: str, tail_ttl: float = 60.0, default_days: int = 365):
+        self.path = path
+        self.tail_ttl = tail_ttl
+        self.default_days = default_days
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _files(self, key: str):
+        return os.path.join(self.path, f"{key}.npy"), os.path.join(self.path, f"{key}.json")
+
+    def _load(self, key: str):
+        data_path, meta_path = self._files(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            return np.load(data_path, mmap_mode="r"), meta
+        except (OSError, ValueError):
+            return np.empty((0, len(COLUMNS)), dtype=np.int64), None
+
+    def _save(self, key: str, bars: np.ndarray, meta: dict):
+        data_path, meta_path = self._files(key)
+        # 쓰는 도중 읽히지 않도록 임시 파일에 저장 후 교체
+        tmp_data_path = f"{data_path}.{os.getpid()}.tmp.npy"
+        with open(tmp_data_path, "wb") as f:
+            np.save(f, bars)
+        os.replace(tmp_data_path, data_path)
+
+        tmp_meta_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta_path, meta_path)
+
+    @staticmethod
+    def _to_array(rows) -> np.ndarray:
+        bars = np.array(
+            [[to_int(row[column]) for column in COLUMNS] for row in rows], dtype=np.int64
+        )
+        return bars.reshape(-1, len(COLUMNS))
+
+    @staticmethod
+    def _merge(bars: np.ndarray, fetched: np.ndarray, from_date: str, to_date: str):
+        dates = bars[:, 0]
+        keep = (dates < int(from_date)) | (dates > int(to_date))
+        merged = np.concatenate([bars[keep], fetched])
+        order = np.lexsort((merged[:, 1], merged[:, 0]))
+        return merged[order]
+
+    def _missing_ranges(self, meta: dict, sdate: str, edate: str):
+        if meta is None:
+            return [(sdate, edate)]
+
+        ranges = []
+        if sdate < meta["from_date"]:
+            ranges.append((sdate, shift_date(meta["from_date"], -1)))
+
+        # 마지막 저장일을 장 마감 전에 받았으면 다시 받음 (같은 날 반복 조회는 tail_ttl마다 한 번)
+        fetched_at = meta.get("fetched_at", 0)
+        tail_open = fetched_at < closed_at(meta["to_date"]) and time.time() - fetched_at > self.tail_ttl
+        if edate > meta["to_date"]:
+            ranges.append((meta["to_date"] if tail_open else shift_date(meta["to_date"], 1), edate))
+        elif edate == meta["to_date"] and tail_open:
+            ranges.append((edate, edate))
+        return ranges
+
+    def get_frame(self, key: str, sdate: str, edate: str, fetch) -> pd.DataFrame:
+        """Return bars between ``sdate`` and ``edate`` (inclusive), calling ``fetch(sdate, edate)`` for gaps."""
+        edate = min(edate or today(), today())
+        sdate = sdate or shift_date(edate, -self.default_days)
+
+        with self._key_lock(key):
+            bars, meta = self._load(key)
+
+            if ranges := self._missing_ranges(meta, sdate, edate):
+                bars = np.array(bars)
+                for from_date, to_date in ranges:
+                    fetched = self._to_array(fetch(from_date, to_date))
+                    bars = self._merge(bars, fetched, from_date, to_date)
+
+                # 마지막 저장일까지 다시 받았으면 fetched_at 갱신 (앞쪽 구간만 받은 경우는 유지)
+                tail_fetched = meta is None or any(to_date >= meta["to_date"] for _, to_date in ranges)
+                meta = {
+                    "from_date": min(sdate, meta["from_date"]) if meta else sdate,
+                    "to_date": max(edate, meta["to_date"]) if meta else edate,
+                    "fetched_at": time.time() if tail_fetched else meta.get("fetched_at", 0),
+                }
+                self._save(key, bars, meta)
+                bars, meta = self._load(key)
+
+        dates = bars[:, 0]
+        start = np.searchsorted(dates, int(sdate), side="left")
+        end = np.searchsorted(dates, int(edate), side="right")
+        # 메모리 맵은 읽기 전용이므로 요청 구간만 복사해서 반환
+        return pd.DataFrame(np.array(bars[start:end]), columns=list(COLUMNS))
@@ -1,6 +1,10 @@
 import asyncio
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List
 
 import httpx
@@ -8,8 +12,10 @@ import requests
 from BaseFetcher import BaseFetcher
 from decouple import config
 from requests import Session
+from requests.adapters import HTTPAdapter
 from urllib3 import disable_warnings
 from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
 
 # from .BaseFetcher import BaseFetcher
 
@@ -18,57 +24,456 @@ assert os.path.isfile(".env"), ".env file not found!"
 
 disable_warnings(InsecureRequestWarning)
 
-class LSFetcher(BaseFetcher):
-    BASE_URL = "https://openapi.ls-sec.co.kr:8080"
+KST = timezone(timedelta(hours=9))
+MARKET_OPEN = (9, 0)  # 정규장 시작 09:00
+MARKET_CLOSE = (15, 30)  # 정규장 마감 15:30
+
+# 장중 현재가 스냅샷 유지 시간 (초) 및 최대 종목 수 (KOSPI+KOSDAQ 전 종목이 들어가는 크기)
+QUOTE_CACHE_TTL = config("LS_QUOTE_CACHE_TTL", default=3.0, cast=float)
+QUOTE_CACHE_SIZE = config("LS_QUOTE_CACHE_SIZE", default=4096, cast=int)
+
+
+def seconds_until_next_open(now: datetime = None) -> float:
+    """Seconds from ``now`` until the next regular KRX session opens (holidays are not considered)."""
+    now = now or datetime.now(KST)
+    next_open = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if now >= next_open:
+        next_open += timedelta(days=1)
+    while next_open.weekday() >= 5:  # 토, 일
+        next_open += timedelta(days=1)
+    return (next_open - now).total_seconds()
+
+
+def is_market_open(now: datetime = None) -> bool:
+    now = now or datetime.now(KST)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
 
+def quote_ttl() -> float:
+    """Short TTL while the market is open, otherwise keep the snapshot until the next open."""
+    now = datetime.now(KST)
+    if is_market_open(now):
+        return QUOTE_CACHE_TTL
+    return max(QUOTE_CACHE_TTL, seconds_until_next_open(now))
+
+
+class _InflightCall:
     def __init__(self):
-        self.headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        super().__init__(self.get_access_token())
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SnapshotCache:
+    """Thread-safe LRU + TTL cache that coalesces concurrent loads of the same key.
+
+    ``ttl`` is either a number of seconds or a callable returning one, evaluated
+    when an entry is stored. At most ``max_size`` entries are kept, so a
+    long-running worker does not grow without bound.
+    """
+
+    def __init__(self, ttl, max_size: int):
+        self._ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> _InflightCall
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _expires_at(self) -> float:
+        ttl = self._ttl() if callable(self._ttl) else self._ttl
+        return time.monotonic() + ttl
+
+    def _lookup(self, key):
+        # self._lock을 잡은 상태에서 호출
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._lookup(key)
+        return entry[1] if entry else None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._expires_at(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry:
+                self.hits += 1
+                return entry[1]
+
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._inflight[key] = _InflightCall()
+                self.misses += 1
+            else:
+                self.coalesced += 1
 
-    def fetch_data(self, url, headers={}, body={}):
-        with Session() as session:
+        # 이미 같은 키를 조회 중이면 그 결과를 함께 사용
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            self.put(key, call.value)
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+# t1102 현재가 스냅샷 (shcode -> t1102OutBlock), 프로세스 전체에서 공유
+QUOTE_CACHE = SnapshotCache(ttl=quote_ttl, max_size=QUOTE_CACHE_SIZE)
+
+# 투자자별 매매동향(t1665) 메모 유지 시간 (초) 및 최대 조회 조건 수
+SALE_TREND_CACHE_TTL = config("LS_SALE_TREND_CACHE_TTL", default=10.0, cast=float)
+SALE_TREND_CACHE_SIZE = config("LS_SALE_TREND_CACHE_SIZE", default=256, cast=int)
+
+# 같은 조건의 t1665 조회를 개인/외국인/기관 메서드가 함께 사용
+SALE_TREND_CACHE = SnapshotCache(ttl=SALE_TREND_CACHE_TTL, max_size=SALE_TREND_CACHE_SIZE)
+
+# 투자자 구분별 t1665 수량/금액 컬럼
+INVESTOR_CODES = {
+    "individual": ("sv_08", "sa_08"),  # 개인
+    "foreign": ("sv_17", "sa_17"),  # 외국인
+    "institutional": ("sv_18", "sa_18"),  # 기관계
+}
+
+# 토큰 캐시 파일 및 만료 전 갱신 여유 시간 (초)
+TOKEN_FILE = config("LS_TOKEN_FILE", default=".ls_token.json")
+TOKEN_REFRESH_MARGIN = config("LS_TOKEN_REFRESH_MARGIN", default=600, cast=int)
+
+
+def request_access_token(base_url: str):
+    """Issue a new OAuth token. Returns ``(access_token, expires_in)`` or ``(None, 0)``."""
+    param = {
+        "grant_type": "client_credentials",
+        "appkey": config("LS_API_KEY"),
+        "appsecretkey": config("LS_API_SECRET_KEY"),
+        "scope": "oob",
+    }
+
+    request = requests.post(
+        f"{base_url}/oauth2/token",
+        verify=False,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        params=param,
+    )
+
+    try:
+        assert request.status_code == 200
+        payload = request.json()
+        return payload["access_token"], int(payload.get("expires_in", 0))
+    except AssertionError:
+        print(
+            f"\tThe request failed with status code {request.status_code}.\n\tRespuest text: {request.text}"
+        )
+        return None, 0
+
+
+class TokenStore:
+    """Process-wide OAuth token holder backed by a file in the sandbox.
+
+    A valid token is served from memory (or the file, on first use in a new
+    process) and refreshed by a background timer ``refresh_margin`` seconds
+    before it expires (or halfway through its lifetime for short-lived
+    tokens), so constructing ``LSFetcher`` never waits on the token
+    endpoint while a cached token is still valid.
+    """
+
+    def __init__(self, base_url: str, path: str, refresh_margin: int):
+        self.base_url = base_url
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_at = 0.0  # epoch seconds
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _is_fresh(self) -> bool:
+        # 만료 직전 토큰은 사용하지 않음 (요청 도중 만료 방지)
+        return self._token is not None and time.time() < self._expires_at - 30
+
+    def get_token(self):
+        if self._is_fresh():
+            return self._token
+
+        with self._lock:
+            if self._is_fresh():
+                return self._token
+            if self._load() and self._is_fresh():
+                self._schedule_refresh()
+                return self._token
+            self._refresh_locked()
+            return self._token
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+            self._token = saved["access_token"]
+            self._expires_at = float(saved["expires_at"])
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"access_token": self._token, "expires_at": self._expires_at}, f)
+        os.replace(tmp_path, self.path)
+
+    def _refresh_locked(self):
+        token, expires_in = request_access_token(self.base_url)
+        if token is None:
+            return
+
+        self._token = token
+        self._expires_at = time.time() + expires_in
+        try:
+            self._save()
+        except OSError as e:
+            print(f"An error occurred: {e}")
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+        remaining = self._expires_at - time.time()
+        delay = max(remaining - self.refresh_margin, remaining / 2, 0)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            # 다른 프로세스가 이미 갱신해 두었으면 파일 토큰 사용
+            expires_at = self._expires_at
+            if self._load() and self._expires_at > expires_at:
+                self._schedule_refresh()
+                return
             try:
-                response = session.request(
-                    method="post", url=f"{self.BASE_URL}/{url}", headers=headers, data=json.dumps(body)
-                )
-                return response
-            except httpx.HTTPStatusError as e:
-                print(
-                    f"HTTP error occurred: {e.response.status_code} - {e.response.text}"
-                )
+                self._refresh_locked()
             except Exception as e:
                 print(f"An error occurred: {e}")
 
-        return None  # Return None if there was an error
 
-    def get_access_token(self):
-        APP_KEY = config("LS_API_KEY")
-        APP_SECRET = config("LS_API_SECRET_KEY")
-
-        param = {
-            "grant_type": "client_credentials",
-            "appkey": APP_KEY,
-            "appsecretkey": APP_SECRET,
-            "scope": "oob",
+BASE_URL = "https://openapi.ls-sec.co.kr:8080"
+
+TOKEN_STORE = TokenStore(BASE_URL, TOKEN_FILE, TOKEN_REFRESH_MARGIN)
+
+# TR 요청용 HTTP 커넥션 풀 설정
+HTTP_POOL_SIZE = config("LS_HTTP_POOL_SIZE", default=10, cast=int)
+HTTP_CONNECT_TIMEOUT = config("LS_HTTP_CONNECT_TIMEOUT", default=3.05, cast=float)
+HTTP_READ_TIMEOUT = config("LS_HTTP_READ_TIMEOUT", default=30.0, cast=float)
+HTTP_MAX_RETRIES = config("LS_HTTP_MAX_RETRIES", default=3, cast=int)
+HTTP_BACKOFF_FACTOR = config("LS_HTTP_BACKOFF_FACTOR", default=0.3, cast=float)
+
+
+def create_session() -> Session:
+    """Keep-alive session with a bounded connection pool and retry/backoff on 5xx and resets."""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=None,  # TR 조회는 POST지만 멱등이므로 재시도 허용
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry
+    )
+
+    session = Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class Transport:
+    """Process-wide pooled HTTP transport shared by every ``LSFetcher``."""
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = create_session()
+        return self._session
+
+    def post(self, url: str, headers: dict, data: str):
+        self.requests += 1
+        return self.session.post(
+            url,
+            headers=headers,
+            data=data,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        )
+
+    def stats(self) -> dict:
+        """Requests sent vs. connections opened; ``reused`` counts requests that skipped a handshake."""
+        connections = 0
+        if self._session is not None:
+            for adapter in set(self._session.adapters.values()):
+                for key in adapter.poolmanager.pools.keys():
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+        return {
+            "requests": self.requests,
+            "connections_opened": connections,
+            "reused": max(self.requests - connections, 0),
         }
 
-        request = requests.post(
-            f"{self.BASE_URL}/oauth2/token",
-            verify=False,
-            headers=self.headers,
-            params=param,
+
+TRANSPORT = Transport()
+
+# 연속 조회 요청 사이 대기 시간 (초) 및 한 번의 조회에서 받을 최대 페이지 수
+PAGE_INTERVAL = config("LS_PAGE_INTERVAL", default=1.0, cast=float)
+MAX_PAGES = config("LS_MAX_PAGES", default=60, cast=int)
+
+# 과거 차트 로컬 저장 경로, 당일 봉 재조회 간격 (초), sdate 생략 시 조회 기간 (일)
+CHART_STORE_DIR = config("LS_CHART_STORE_DIR", default=".chart_store")
+CHART_TAIL_TTL = config("LS_CHART_TAIL_TTL", default=60.0, cast=float)
+CHART_DEFAULT_DAYS = config("LS_CHART_DEFAULT_DAYS", default=365, cast=int)
+_chart_store = None
+
+# 다종목 일괄 조회 동시 요청 수 및 초당 요청 제한 (t1102)
+BATCH_CONCURRENCY = config("LS_BATCH_CONCURRENCY", default=5, cast=int)
+BATCH_RATE_LIMIT = config("LS_BATCH_RATE_LIMIT", default=10.0, cast=float)
+
+
+class AsyncRateLimiter:
+    """Spaces request starts at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def to_frame(rows, columns: dict, numeric=(), date_column: str = ""):
+    """Build a DataFrame straight from TR rows, keeping and renaming only ``columns``.
+
+    ``numeric`` columns are cast with one vectorized ``pd.to_numeric`` each and
+    ``date_column`` ('YYYYMMDD') becomes a ``DatetimeIndex``.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(rows, columns=list(columns))
+    frame = frame.rename(columns=columns)
+    for column in numeric:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    if date_column:
+        frame.index = pd.DatetimeIndex(
+            pd.to_datetime(frame.pop(date_column), format="%Y%m%d"), name=date_column
         )
+    return frame
+
 
+class LSFetcher(BaseFetcher):
+    BASE_URL = BASE_URL
+
+    def __init__(self, typed: bool = False):
+        # typed=True 이면 목록 조회 결과를 pandas DataFrame으로 반환
+        self.typed = typed
+        self.headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        super().__init__(self.get_access_token())
+
+    @staticmethod
+    def get_quote_cache_stats() -> dict:
+        """Hit/miss counters of the shared t1102 snapshot cache."""
+        return QUOTE_CACHE.stats()
+
+    @staticmethod
+    def get_transport_stats() -> dict:
+        """Connection reuse counters of the shared HTTP transport."""
+        return TRANSPORT.stats()
+
+    def fetch_data(self, url, headers={}, body={}):
         try:
-            assert request.status_code == 200
-            return request.json()["access_token"]
-        except AssertionError:
+            response = TRANSPORT.post(
+                f"{self.BASE_URL}/{url}", headers=headers, data=json.dumps(body)
+            )
+            return response
+        except httpx.HTTPStatusError as e:
             print(
-                f"\tThe request failed with status code {request.status_code}.\n\tRespuest text: {request.text}"
+                f"HTTP error occurred: {e.response.status_code} - {e.response.text}"
             )
-            return None
+        except Exception as e:
+            print(f"An error occurred: {e}")
 
-    def get_today_stock_infos(self, shcode: str) -> dict:
+        return None  # Return None if there was an error
+
+    def get_access_token(self):
+        return TOKEN_STORE.get_token()
+
+    def get_today_stock_infos(self, shcode: str, use_cache: bool = True) -> dict:
+        if not use_cache:
+            return dict(self._fetch_today_stock_infos(shcode))
+
+        stocks = QUOTE_CACHE.get_or_load(
+            shcode, lambda: self._fetch_today_stock_infos(shcode)
+        )
+        return dict(stocks)
+
+    def _fetch_today_stock_infos(self, shcode: str) -> dict:
         headers = {
             "content-type": "application/json; charset=utf-8",
             "authorization": f"Bearer {self.api_key}",
@@ -84,6 +489,86 @@ class LSFetcher(BaseFetcher):
         stocks = response.json()["t1102OutBlock"]
         return stocks
 
+    async def aget_today_stock_infos_many(
+        self, shcodes: List[str], concurrency: int = BATCH_CONCURRENCY
+    ) -> List[Dict]:
+        headers = {
+            "content-type": "application/json; charset=utf-8",
+            "authorization": f"Bearer {self.api_key}",
+            "tr_cd": "t1102",
+            "tr_cont": "N",
+        }
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        rate_limiter = AsyncRateLimiter(BATCH_RATE_LIMIT)
+
+        async def fetch_one(client, shcode):
+            if (cached := QUOTE_CACHE.get(shcode)) is not None:
+                return {"shcode": shcode, "data": dict(cached), "error": None}
+
+            async with semaphore:
+                await rate_limiter.wait()
+                body = json.dumps({"t1102InBlock": {"shcode": shcode}})
+                response = await super(LSFetcher, self).fetch_data(
+                    f"{self.BASE_URL}/stock/market-data",
+                    method="POST",
+                    headers=headers,
+                    body=body,
+                    client=client,
+                )
+
+            if response is None:
+                return {"shcode": shcode, "data": None, "error": "request failed"}
+            if "t1102OutBlock" not in response:
+                return {"shcode": shcode, "data": None, "error": response.get("rsp_msg", "no data")}
+
+            QUOTE_CACHE.put(shcode, response["t1102OutBlock"])
+            return {"shcode": shcode, "data": dict(response["t1102OutBlock"]), "error": None}
+
+        limits = httpx.Limits(max_connections=max(concurrency, 1))
+        timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            return await asyncio.gather(*(fetch_one(client, shcode) for shcode in shcodes))
+
+    def get_today_stock_infos_many(
+        self, shcodes: List[str], concurrency: int = BATCH_CONCURRENCY
+    ) -> List[Dict]:
+        """
+        Retrieves today's market data for several stocks at once, fetched concurrently. This function only can retrieve data for the current trading day.
+        Prefer this over calling get_today_stock_* in a loop when comparing multiple stocks.
+
+        Args:
+            shcodes (List[str]): The stock codes of the stocks to fetch.
+            concurrency (int, optional): The maximum number of requests in flight. Defaults to 5.
+
+        Returns:
+            List[Dict]: One entry per stock code, in the same order as shcodes.
+                - shcode (str): The stock code.
+                - data (dict): The market data of the stock, or None if it failed.
+                    Keys: hname, price, diff, volume, open, high, low, per, total.
+                - error (str): The error message if the request failed, otherwise None.
+        """
+        coroutine = self.aget_today_stock_infos_many(shcodes, concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        # Jupyter 커널처럼 이벤트 루프가 이미 돌고 있으면 별도 스레드에서 실행
+        result = {}
+
+        def runner():
+            try:
+                result["value"] = asyncio.run(coroutine)
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=runner)
+        thread.start()
+        thread.join()
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
     def get_today_stock_hname(self, shcode: str) -> str:  # 한글명
         """
         Retrieves the Korean name of a stock from today's stock market data.
@@ -100,7 +585,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_price(self, shcode: str) -> int:  # 현재가
         """
-        Retrieves the current price of a given stock.
+        Retrieves the current price of a given stock. For closing prices of past days, use get_stock_chart_frame.
 
         Args:
             shcode (str): The stock code of the stock whose price of which should be returned.
@@ -114,7 +599,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_diff(self, shcode: str) -> int:  # 등락율
         """
-        Retrieves the price fluctuation rate of a given stock.
+        Retrieves today's price fluctuation rate of a given stock against the previous close.
 
         Args:
             shcode (str): The stock code of the stock whose fluctuation rate of which should be returned.
@@ -128,7 +613,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_volume(self, shcode: str) -> int:  # 누적거래량
         """
-        Retrieves the accumulated trading volume of a given stock.
+        Retrieves the trading volume of a given stock accumulated since today's open. For the volume of past days, use get_stock_chart_frame.
 
         Args:
             shcode (str): The stock code of the stock whose trading volume of which should be returned.
@@ -142,7 +627,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_open(self, shcode: str) -> int:  # 시가
         """
-        Retrieves the opening price of a given stock of today.
+        Retrieves the opening price of a given stock of today. For the opening price of past days, use get_stock_chart_frame.
 
         Args:
             shcode (str): The stock code of the stock whose opening price of which should be returned.
@@ -156,7 +641,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_high(self, shcode: str) -> int:  # 고가
         """
-        Retrieves the highest price of a given stock of today.
+        Retrieves the highest price of a given stock so far today.
 
         Args:
             shcode (str): The stock code of the stock whose highest price of which should be returned.
@@ -170,7 +655,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_low(self, shcode: str) -> int:  # 저가
         """
-        Retrieves the lowest price of a given stock of today.
+        Retrieves the lowest price of a given stock so far today.
 
         Args:
             shcode (str): The stock code of the stock whose lowest price of which should be returned.
@@ -184,7 +669,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_per(self, shcode: str) -> int:  # PER
         """
-        Retrieves the price-to-earnings ratio (PER) of a given stock of today.
+        Retrieves the price-to-earnings ratio (PER) of a given stock at today's price; past PER values are not available.
 
         Args:
             shcode (str): The stock code of the stock whose PER of which should be returned.
@@ -198,7 +683,7 @@ class LSFetcher(BaseFetcher):
 
     def get_today_stock_total(self, shcode: str) -> int:  # 시가 총액
         """
-        Retrieves the market capitalization of a given stock of today.
+        Retrieves the market capitalization of a given stock at today's price; past values are not available.
 
         Args:
             shcode (str): The stock code of the stock whose market capitalization of which should be returned.
@@ -210,6 +695,101 @@ class LSFetcher(BaseFetcher):
 
         return stock_infos["total"]
 
+    def iter_pages(
+        self,
+        url: str,
+        tr_cd: str,
+        body: dict,
+        out_block: str,
+        cts_block: str = "",
+        cts_fields: tuple = (),
+        stop_date: str = "",
+        max_pages: int = None,
+    ):
+        """Yield ``out_block`` rows page by page, following LS continuation keys.
+
+        Continuation uses the ``tr_cont``/``tr_cont_key`` response headers and,
+        for TRs that page by date, copies ``cts_fields`` from ``cts_block`` into
+        the next request body. Rows dated before ``stop_date`` are dropped and
+        paging stops once a page reaches it. At most ``max_pages`` pages
+        (default ``MAX_PAGES``, 0 for no limit) are fetched.
+        """
+        max_pages = MAX_PAGES if max_pages is None else max_pages
+        in_block = f"{tr_cd}InBlock"
+        body = {in_block: dict(body[in_block])}
+        tr_cont, tr_cont_key = "N", ""
+        pages = 0
+
+        while True:
+            headers = {
+                "content-type": "application/json; charset=utf-8",
+                "authorization": f"Bearer {self.api_key}",
+                "tr_cd": tr_cd,
+                "tr_cont": tr_cont,
+                "tr_cont_key": tr_cont_key,
+            }
+            response = self.fetch_data(url=url, headers=headers, body=body)
+            payload = response.json()
+            rows = payload[out_block]
+            pages += 1
+
+            reached_stop = False
+            if stop_date and rows:
+                reached_stop = min(row["date"] for row in rows) <= stop_date
+                rows = [row for row in rows if row["date"] >= stop_date]
+            if rows:
+                yield rows
+
+            if reached_stop or not rows or response.headers.get("tr_cont") != "Y":
+                break
+            if max_pages and pages >= max_pages:
+                print(f"{tr_cd}: stopped after {max_pages} pages, older rows were not fetched")
+                break
+
+            tr_cont, tr_cont_key = "Y", response.headers.get("tr_cont_key", "")
+            for field in cts_fields:
+                body[in_block][field] = payload[cts_block][field]
+            if cts_fields and not any(body[in_block][field] for field in cts_fields):
+                break
+
+            # 연속 조회 TR 호출 제한 (초당 건수)
+            time.sleep(PAGE_INTERVAL)
+
+    def iter_stock_chart_info(
+        self, shcode: str, ncnt: int, sdate: str = "", edate: str = "", max_pages: int = None
+    ):
+        """Stream ``t8412`` chart rows page by page, newest page first, stopping at ``sdate``.
+
+        An empty ``sdate`` means ``CHART_DEFAULT_DAYS`` before ``edate`` (or today),
+        so a call without a start date does not page through the whole history.
+        """
+        if not sdate:
+            end = datetime.strptime(edate, "%Y%m%d") if edate else datetime.now(KST)
+            sdate = (end - timedelta(days=CHART_DEFAULT_DAYS)).strftime("%Y%m%d")
+        body = {
+            "t8412InBlock": {
+                "shcode": shcode,  # shortcut code
+                "ncnt": ncnt,  # time unit
+                "qrycnt": 0,
+                "nday": "0",
+                "sdate": sdate,  # "YYYYMMDD"
+                "edate": edate,  # "YYYYMMDD"
+                "cts_date": "",
+                "cts_time": "",
+                "comp_yn": "N",
+            }
+        }
+        return self.iter_pages(
+            url="stock/chart",
+            tr_cd="t8412",
+            body=body,
+            out_block="t8412OutBlock1",
+            cts_block="t8412OutBlock",
+            cts_fields=("cts_date", "cts_time"),
+            stop_date=sdate,
+            max_pages=max_pages,
+        )
+
     def get_stock_chart_info(
         self, shcode: str, ncnt: int, sdate: str = "", edate: str = ""
     ):  # 주식 차트
@@ -219,11 +799,12 @@ class LSFetcher(BaseFetcher):
         Args:
             shcode (str): The stock code of the stock whose chart information you want to fetch.
             ncnt (int): The time unit for the chart data.
-            sdate (str, optional): The start date for the chart data in 'YYYYMMDD' format. Defaults to "".
-            edate (str, optional): The end date for the chart data in 'YYYYMMDD' format. Defaults to "".
+            sdate (str, optional): The start date for the chart data in 'YYYYMMDD' format. Defaults to one year before edate.
+            edate (str, optional): The end date for the chart data in 'YYYYMMDD' format. Defaults to today.
 
         Returns:
-            List[Dict]: List of the stock chart information.
+            List[Dict]: List of the stock chart information in date and time order.
+            Very long ranges of short time units are cut off at the oldest end; use get_stock_chart_frame for those.
                 - date (str): The date for the stock data in 'YYYYMMDD' format.
                 - time (str): The time for the stock data in 'hhmmss' format.
                 - open (int): The opening price of the stock.
@@ -233,45 +814,65 @@ class LSFetcher(BaseFetcher):
                 - jdiff_vol (int): The trading volume of the stock.
                 - value (int): The trading value of the stock.
         """
-        headers = {
-            "content-type": "application/json; charset=utf-8",
-            "authorization": f"Bearer {self.api_key}",
-            "tr_cd": "t8412",
-            "tr_cont": "N",
-        }
-        body = {
-            "t8412InBlock": {
-                "shcode": shcode,  # shortcut code
-                "ncnt": ncnt,  # time unit
-                "qrycnt": 0,
-                "nday": "0",
-                "sdate": sdate,  # "YYYYMMDD"
-                "edate": edate,  # "YYYYMMDD"
-                "cts_date": "",
-                "cts_time": "",
-                "comp_yn": "N",
-            }
-        }
+        stocks = [
+            row
+            for page in self.iter_stock_chart_info(shcode, ncnt, sdate, edate)
+            for row in page
+        ]
+        # 연속 조회 페이지는 최신 구간부터 내려오므로 시간순으로 정렬
+        stocks.sort(key=lambda row: (row["date"], row.get("time", "")))
+        return stocks
 
-        response = self.fetch_data(url="stock/chart", headers=headers, body=body)
+    def get_stock_chart_frame(
+        self, shcode: str, ncnt: int, sdate: str = "", edate: str = ""
+    ):
+        """
+        Retrieves the stock chart information for a given stock as a pandas DataFrame.
+        Past bars are stored locally, so repeated or overlapping date ranges only fetch the missing days.
+        Prefer this over get_stock_chart_info for long date ranges.
 
-        stocks = response.json()["t8412OutBlock1"]
-        return stocks
+        Args:
+            shcode (str): The stock code of the stock whose chart information you want to fetch.
+            ncnt (int): The time unit for the chart data.
+            sdate (str, optional): The start date for the chart data in 'YYYYMMDD' format. Defaults to one year before edate.
+            edate (str, optional): The end date for the chart data in 'YYYYMMDD' format. Defaults to today.
 
-    def get_investor_sale_trend(
+        Returns:
+            pandas.DataFrame: The stock chart information sorted by date and time, with int64 columns (blank fields are 0).
+                - date (int): The date for the stock data as a YYYYMMDD number.
+                - time (int): The time for the stock data as a hhmmss number.
+                - open (int): The opening price of the stock.
+                - high (int): The highest price of the stock.
+                - low (int): The lowest price of the stock.
+                - close (int): The closing price of the stock.
+                - jdiff_vol (int): The trading volume of the stock.
+                - value (int): The trading value of the stock.
+        """
+        global _chart_store
+        from ChartStore import ChartStore
+
+        if _chart_store is None:
+            _chart_store = ChartStore(CHART_STORE_DIR, tail_ttl=CHART_TAIL_TTL, default_days=CHART_DEFAULT_DAYS)
+
+        def fetch(from_date, to_date):
+            return [
+                row
+                # 받은 구간은 저장소에 기록되므로 페이지 수 제한 없이 끝까지 받음
+                for page in self.iter_stock_chart_info(shcode, ncnt, from_date, to_date, max_pages=0)
+                for row in page
+            ]
+
+        return _chart_store.get_frame(f"{shcode}_{ncnt}", sdate, edate, fetch)
+
+    def iter_investor_sale_trend(
         self,
         upcode: str,
         gubun2: str,
         gubun3: str,
         from_date: str,
         to_date: str,
-    ) -> List[Dict]:
-        headers = {
-            "content-type": "application/json; charset=utf-8",
-            "authorization": f"Bearer {self.api_key}",
-            "tr_cd": "t1665",
-            "tr_cont": "N",
-        }
+    ):
+        """Stream ``t1665`` investor trend rows page by page, stopping at ``from_date``."""
         body = {
             "t1665InBlock": {
                 "market": "1",
@@ -282,11 +883,94 @@ class LSFetcher(BaseFetcher):
                 "to_date": to_date,  # "YYYYMMDD"
             }
         }
+        return self.iter_pages(
+            url="stock/chart",
+            tr_cd="t1665",
+            body=body,
+            out_block="t1665OutBlock1",
+            stop_date=from_date,
+        )
+
+    def get_investor_sale_trend(
+        self,
+        upcode: str,
+        gubun2: str,
+        gubun3: str,
+        from_date: str,
+        to_date: str,
+    ) -> List[Dict]:
+        def load():
+            rows = [
+                row
+                for page in self.iter_investor_sale_trend(
+                    upcode, gubun2, gubun3, from_date, to_date
+                )
+                for row in page
+            ]
+            # t1665는 최신 날짜부터 내려주므로 날짜 오름차순으로 정렬
+            return sorted(rows, key=lambda row: row["date"])
+
+        sale_trends = SALE_TREND_CACHE.get_or_load(
+            (upcode, gubun2, gubun3, from_date, to_date), load
+        )
+        return list(sale_trends)
+
+    def get_investor_sale_trends(
+        self,
+        upcode: str,
+        gubun2: str,
+        gubun3: str,
+        from_date: str,
+        to_date: str,
+        investors: List[str] = None,
+    ):
+        """
+        Fetches the sale trends of several investor types in the KOSPI with a single request.
+        Prefer this over calling the individual, foreign and institutional methods one by one.
 
-        response = self.fetch_data(url="stock/chart", headers=headers, body=body)
+        Args:
+            upcode (str): The upcode of the stock.
+            gubun2 (str): The second classification for the trend data.
+            gubun3 (str): The third classification for the trend data.
+            from_date (str): The start date for the trend data in 'YYYYMMDD' format.
+            to_date (str): The end date for the trend data in 'YYYYMMDD' format.
+            investors (List[str], optional): Any of "individual", "foreign" and "institutional". Defaults to all of them; an empty list raises ValueError.
 
-        sale_trends = response.json()["t1665OutBlock1"]
-        return sale_trends
+        Returns:
+            Dict[str, List]: Columns of the sale trend data, each a list in date order.
+                - date (str): The date for the trend data in 'YYYYMMDD' format.
+                - <investor>_sale_volume (int): The trading volume of each requested investor type.
+                - <investor>_sale_amount (str): The trading amount of each requested investor type.
+            With LSFetcher(typed=True), a pandas DataFrame indexed by date with the same numeric columns is returned instead.
+        """
+        if investors is None:
+            investors = list(INVESTOR_CODES)
+        if not investors:
+            raise ValueError("investors must name at least one investor type")
+        unknown = [investor for investor in investors if investor not in INVESTOR_CODES]
+        if unknown:
+            raise ValueError(f"Unknown investor types: {unknown}")
+
+        total_investor_sale_trends = self.get_investor_sale_trend(
+            upcode, gubun2, gubun3, from_date, to_date
+        )
+
+        columns = {"date": "date"}
+        for investor in investors:
+            sv_code, sa_code = INVESTOR_CODES[investor]
+            columns[sv_code] = f"{investor}_sale_volume"
+            columns[sa_code] = f"{investor}_sale_amount"
+
+        if self.typed:
+            numeric = [column for column in columns.values() if column != "date"]
+            return to_frame(
+                total_investor_sale_trends, columns, numeric=numeric, date_column="date"
+            )
+
+        return {
+            name: [trend[code] for trend in total_investor_sale_trends]
+            for code, name in columns.items()
+        }
 
     def get_specific_investor_sale_trend(
         self,
@@ -302,6 +986,14 @@ class LSFetcher(BaseFetcher):
             upcode, gubun2, gubun3, from_date, to_date
         )
 
+        if self.typed:
+            return to_frame(
+                total_investor_sale_trends,
+                {"date": "date", sv_code: "sale_volume", sa_code: "sale_amount"},
+                numeric=("sale_volume", "sale_amount"),
+                date_column="date",
+            )
+
         specific_investor_sale_trend = []
 
         for temp_trend in total_investor_sale_trends:
@@ -338,10 +1030,12 @@ class LSFetcher(BaseFetcher):
             to_date (str): The end date for the trend data in 'YYYYMMDD' format.
 
         Returns:
-            List[Dict]: List of the sale trend data for individual investors.
+            List[Dict]: List of the sale trend data for individual investors, in date order.
                 - date (str): The date for the trend data in 'YYYYMMDD' format.
                 - sale_volume (int): The trading volume of individual investors
                 - sale_amount (str): the trading amount of individual investors
+            With LSFetcher(typed=True), a pandas DataFrame indexed by date with numeric
+            sale_volume and sale_amount columns is returned instead.
         """
         return self.get_specific_investor_sale_trend(
             upcode,
@@ -372,10 +1066,12 @@ class LSFetcher(BaseFetcher):
             to_date (str): The end date for the trend data in 'YYYYMMDD' format.
 
         Returns:
-            List[Dict]: List of the sale trend data for foreign investors.
+            List[Dict]: List of the sale trend data for foreign investors, in date order.
                 - date (str): The date for the trend data in 'YYYYMMDD' format.
                 - sale_volume (int): The trading volume of foreign investors
                 - sale_amount (str): the trading amount of foreign investors
+            With LSFetcher(typed=True), a pandas DataFrame indexed by date with numeric
+            sale_volume and sale_amount columns is returned instead.
         """
 
         return self.get_specific_investor_sale_trend(
@@ -407,10 +1103,12 @@ class LSFetcher(BaseFetcher):
             to_date (str): The end date for the trend data in 'YYYYMMDD' format.
 
         Returns:
-            List[Dict]: List of the sale trend data for institutional investors.
+            List[Dict]: List of the sale trend data for institutional investors, in date order.
                 - date (str): The date for the trend data in 'YYYYMMDD' format.
                 - sale_volume (int): The trading volume of institutional investors
                 - sale_amount (str): the trading amount of institutional investors
+            With LSFetcher(typed=True), a pandas DataFrame indexed by date with numeric
+            sale_volume and sale_amount columns is returned instead.
         """
 
         return self.get_specific_investor_sale_trend(
@@ -436,6 +1134,7 @@ class LSFetcher(BaseFetcher):
             List[Dict]: List of the ETF composition data.
                 - hname (str): The korean name of stock.
                 - weight (str): The ratio of stocks that make up an ETF.
+            With LSFetcher(typed=True), a pandas DataFrame with a float weight column is returned instead.
         """
         headers = {
             "content-type": "application/json; charset=utf-8",
@@ -454,6 +1153,11 @@ class LSFetcher(BaseFetcher):
         response = self.fetch_data(url="stock/etf", headers=headers, body=body)
 
         etf_comp_total = response.json()["t1904OutBlock1"]
+        if self.typed:
+            return to_frame(
+                etf_comp_total, {"hname": "hname", "weight": "weight"}, numeric=("weight",)
+            )
+
         etf_comp_summary = []
 
         for etf_comp in etf_comp_total:
@@ -495,6 +1199,14 @@ class LSFetcher(BaseFetcher):
         )
 
         high_items = response.json()["t1441OutBlock1"]
+        if self.typed:
+            rate_column = "increase_rate" if gubun2 == "0" else "decrease_rate"
+            return to_frame(
+                high_items[:amount],
+                {"hname": "hname", "jnildiff": rate_column},
+                numeric=(rate_column,),
+            )
+
         result = []
 
         for high_item in high_items[:amount]:
@@ -527,6 +1239,7 @@ class LSFetcher(BaseFetcher):
             List[Dict]: List of the items with the highest increase rates.
                 - hname (str): The korean name of stock.
                 - increase_rate (str): the rate of incline compared to the previous day
+            With LSFetcher(typed=True), a pandas DataFrame with a float increase_rate column is returned instead.
         """
         return self.get_high_fluctuation_item(amount=amount, gubun2="0")
 
@@ -541,6 +1254,7 @@ class LSFetcher(BaseFetcher):
             List[Dict]: List of the items with the highest decrease rates.
                 - hname (str): The korean name of stock.
                 - decrease_rate (str): The rate of decline compared to the previous day.
+            With LSFetcher(typed=True), a pandas DataFrame with a float decrease_rate column is returned instead.
         """
 
         return self.get_high_fluctuation_item(amount=amount, gubun2="1")
@@ -0,0 +1,108 @@
+import pytest
+
+import ChartStore as chart_store
+from ChartStore import COLUMNS, ChartStore, closed_at, shift_date
+
+
+def bar(date: str, close: int, time: str = "000000"):
+    row = {column: "1" for column in COLUMNS}
+    row.update(date=date, time=time, close=str(close))
+    return row
+
+
+class FakeLS:
+    """t8412 stand-in that records every requested range."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, from_date: str, to_date: str):
+        self.calls.append((from_date, to_date))
+        return [row for row in self.bars if from_date <= row["date"] <= to_date]
+
+
+@pytest.fixture(autouse=True)
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(chart_store, "today", lambda: "20240110")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChartStore(str(tmp_path), tail_ttl=60, default_days=5)
+
+
+def test_overlapping_range_fetches_only_the_gap(store):
+    ls = FakeLS([bar(f"202401{day:02d}", day) for day in range(1, 11)])
+
+    store.get_frame("005930_0", "20240105", "20240108", ls)
+    frame = store.get_frame("005930_0", "20240103", "20240108", ls)
+
+    assert ls.calls == [("20240105", "20240108"), ("20240103", "20240104")]
+    assert frame["close"].tolist() == [3, 4, 5, 6, 7, 8]
+
+
+@pytest.mark.filterwarnings("ignore::pandas.errors.SettingWithCopyWarning")
+def test_frame_is_writable(store):
+    ls = FakeLS([bar("20240102", 1), bar("20240103", 2)])
+    frame = store.get_frame("005930_0", "20240101", "20240105", ls)
+
+    frame["ma"] = frame["close"].rolling(2).mean()
+    frame.iloc[0, frame.columns.get_loc("close")] = 100
+    recent = frame[frame["date"] > 20240102]
+    recent["close"] = 0
+
+    again = store.get_frame("005930_0", "20240101", "20240105", ls)
+    assert again["close"].tolist() == [1, 2]
+
+
+def test_blank_fields_are_stored_as_zero(store):
+    row = bar("20240102", 1)
+    row.update(jdiff_vol="", value=" ")
+    frame = store.get_frame("005930_0", "20240101", "20240105", FakeLS([row]))
+
+    assert frame[["jdiff_vol", "value"]].iloc[0].tolist() == [0, 0]
+
+
+def test_today_is_refetched_at_most_once_per_ttl(store, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(chart_store.time, "time", lambda: clock[0])
+    ls = FakeLS([bar("20240109", 1), bar("20240110", 2)])
+
+    store.get_frame("005930_0", "20240109", "", ls)
+    store.get_frame("005930_0", "20240109", "", ls)
+    clock[0] += 61
+    store.get_frame("005930_0", "20240109", "", ls)
+
+    assert ls.calls == [("20240109", "20240110"), ("20240110", "20240110")]
+
+
+def test_closed_days_are_not_refetched(store):
+    ls = FakeLS([bar(f"202401{day:02d}", day) for day in range(2, 10)])
+
+    store.get_frame("005930_0", "20240102", "20240109", ls)
+    store.get_frame("005930_0", "20240102", "20240109", ls)
+    store.get_frame("005930_0", "20240105", "20240110", ls)
+
+    assert ls.calls == [("20240102", "20240109"), ("20240110", "20240110")]
+
+
+def test_day_fetched_before_the_close_is_refetched_once(store, monkeypatch):
+    clock = [closed_at("20240109") - 3600]
+    monkeypatch.setattr(chart_store.time, "time", lambda: clock[0])
+    ls = FakeLS([bar("20240109", 1)])
+
+    store.get_frame("005930_0", "20240109", "20240109", ls)
+    clock[0] = closed_at("20240109") + 3600
+    store.get_frame("005930_0", "20240109", "20240109", ls)
+    clock[0] += 3600
+    store.get_frame("005930_0", "20240109", "20240109", ls)
+
+    assert ls.calls == [("20240109", "20240109")] * 2
+
+
+def test_empty_sdate_is_bounded(store):
+    ls = FakeLS([])
+    store.get_frame("005930_0", "", "", ls)
+
+    assert ls.calls == [(shift_date("20240110", -5), "20240110")]
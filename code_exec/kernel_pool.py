@@ -0,0 +1,146 @@
+import os
+import uuid
+
+from codeboxapi.schema import CodeBoxOutput
+from jupyter_client import KernelManager
+
+from session_pool import SessionPool
+
+# 로컬 커널 작업 디렉토리 (LSFetcher.py, .env 위치)
+FETCH_DIR = os.path.abspath("./fetch")
+
+# MIME bundle에서 이미지로 취급할 타입 (우선순위 순)
+IMAGE_MIME_TYPES = ("image/png", "image/jpeg")
+
+# 실행마다 import에 걸린 시간을 재는 훅 (user_expressions로 읽어 감)
+IMPORT_TIMER = """\
+import builtins as _builtins
+import time as _time
+
+_original_import = _builtins.__import__
+_import_state = {"seconds": 0.0, "depth": 0}
+
+def _timed_import(*args, **kwargs):
+    if _import_state["depth"]:
+        return _original_import(*args, **kwargs)
+    _import_state["depth"] += 1
+    start = _time.perf_counter()
+    try:
+        return _original_import(*args, **kwargs)
+    finally:
+        _import_state["depth"] -= 1
+        _import_state["seconds"] += _time.perf_counter() - start
+
+def _reset_import_seconds(*args):
+    _import_state["seconds"] = 0.0
+
+def _pop_import_seconds():
+    seconds, _import_state["seconds"] = _import_state["seconds"], 0.0
+    return seconds
+
+_builtins.__import__ = _timed_import
+get_ipython().events.register("pre_run_cell", _reset_import_seconds)
+"""
+
+
+class LocalKernel:
+    """A Jupyter kernel on this host that runs code like ``CodeBox.run``."""
+
+    supports_streaming = True
+
+    def __init__(self, cwd: str, startup_timeout: float):
+        self.session_id = f"kernel-{uuid.uuid4().hex[:8]}"
+        self.startup_timeout = startup_timeout
+        self.manager = KernelManager(kernel_name="python3")
+        self.manager.start_kernel(cwd=cwd)
+        self.client = self.manager.client()
+        self.client.start_channels()
+        self.client.wait_for_ready(timeout=startup_timeout)
+        self.last_import_seconds = None
+        self.install_import_timer()
+
+    def install_import_timer(self):
+        self.client.execute_interactive(IMPORT_TIMER, store_history=False, timeout=self.startup_timeout)
+
+    def run(self, code: str, timeout: float = None, on_output=None) -> CodeBoxOutput:
+        texts, images, errors = [], [], []
+        emit = on_output or (lambda event: None)
+
+        def output_hook(msg):
+            msg_type, content = msg["msg_type"], msg["content"]
+            if msg_type == "stream":
+                texts.append(content["text"])
+                emit({"type": "stdout", "text": content["text"]})
+            elif msg_type in ("display_data", "execute_result"):
+                data = content["data"]
+                mime = next((mime for mime in IMAGE_MIME_TYPES if mime in data), None)
+                if mime is not None:
+                    images.append((mime, data[mime]))
+                    emit({"type": "image", "mime": mime, "data": data[mime]})
+                elif "text/plain" in data:
+                    texts.append(data["text/plain"])
+                    emit({"type": "stdout", "text": data["text/plain"]})
+            elif msg_type == "error":
+                errors.append(f"{content['ename']}: {content['evalue']}")
+                emit({"type": "error", "text": errors[-1]})
+
+        reply = self.client.execute_interactive(
+            code,
+            store_history=False,
+            user_expressions={"import_seconds": "_pop_import_seconds()"},
+            timeout=timeout,
+            output_hook=output_hook,
+        )
+
+        expression = reply["content"].get("user_expressions", {}).get("import_seconds", {})
+        if expression.get("status") == "ok":
+            self.last_import_seconds = float(expression["data"]["text/plain"])
+        else:
+            self.last_import_seconds = None
+
+        # CodeBox와 같은 형태로 결과 하나만 반환 (이미지 > 에러 > 텍스트)
+        if images:
+            mime, image = images[-1]
+            return CodeBoxOutput(type=mime, content=image)
+        if errors:
+            return CodeBoxOutput(type="error", content="\n".join(errors))
+        return CodeBoxOutput(type="text", content="".join(texts))
+
+    def interrupt(self):
+        # SIGINT: 실행 중인 셀에 KeyboardInterrupt를 일으켜 execute_interactive가 반환되게 함
+        self.manager.interrupt_kernel()
+
+    def restart(self):
+        self.manager.restart_kernel(now=True)
+        self.client.wait_for_ready(timeout=self.startup_timeout)
+        self.install_import_timer()
+
+    def is_alive(self) -> bool:
+        return self.manager.is_alive()
+
+    def stop(self):
+        self.client.stop_channels()
+        self.manager.shutdown_kernel(now=True)
+
+
+class KernelPool(SessionPool):
+    """Pre-started local Jupyter kernels that report per-execution import time."""
+
+    def __init__(self, *args, startup_timeout: float = 60.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.startup_timeout = startup_timeout
+
+    def create_session(self) -> LocalKernel:
+        return LocalKernel(cwd=FETCH_DIR, startup_timeout=self.startup_timeout)
+
+    def is_healthy(self, kernel: LocalKernel) -> bool:
+        return kernel.is_alive()
+
+    def reset_session(self, kernel: LocalKernel):
+        kernel.restart()
+
+    def stop_session(self, kernel: LocalKernel):
+        kernel.stop()
+
+    def interrupt_session(self, kernel: LocalKernel):
+        kernel.interrupt()
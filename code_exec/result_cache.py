@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+# 실시간 시세/장중 순위를 조회하는 코드는 캐시하지 않음
+# llm 서비스는 done 이벤트의 realtime 값으로 같은 판단을 받아 씀 (목록은 여기 하나만 유지)
+REALTIME_MARKERS = (
+    "get_today_",
+    "get_high_fluctuation_item",  # t1441 장중 등락률 상위
+    "get_high_increase_rate_item",
+    "get_high_decrease_rate_item",
+    "yfinance",
+)
+
+
+def normalize_code(code: str) -> str:
+    """Drop blank lines, trailing whitespace and CRLF so formatting-only differences share a key."""
+    lines = (line.rstrip() for line in code.replace("\r\n", "\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def freshness_epoch(intraday_seconds: int, now: datetime = None) -> str:
+    """Label of the current data-freshness window.
+
+    During the regular session (09:00-15:30 KST on weekdays) the label changes
+    every ``intraday_seconds``; outside it, only at the date change and the
+    close, so results computed from closed bars are shared until the next
+    session starts.
+    """
+    now = now or datetime.now(KST)
+    market_open = now.weekday() < 5 and (9, 0) <= (now.hour, now.minute) < (15, 30)
+    if market_open:
+        return f"{now:%Y%m%d}-open-{int(now.timestamp()) // intraday_seconds}"
+    return f"{now:%Y%m%d}-{'post' if now.hour >= 15 else 'pre'}"
+
+
+class ResultCache:
+    """LRU + TTL cache of execution results keyed by normalized code and freshness epoch.
+
+    Size is bounded by the total bytes of cached result content, since chart
+    images dominate memory; entries larger than ``max_entry_bytes`` are not
+    stored.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int, ttl: float, intraday_seconds: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.intraday_seconds = intraday_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, result, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def should_bypass(code: str) -> bool:
+        """True when ``code`` reads real-time data (quotes, intraday rankings, yfinance)."""
+        return any(marker in code for marker in REALTIME_MARKERS)
+
+    def key(self, code: str) -> str:
+        epoch = freshness_epoch(self.intraday_seconds)
+        return hashlib.sha256(f"{epoch}\0{normalize_code(code)}".encode()).hexdigest()
+
+    def get(self, code: str):
+        """Cached result for ``code``, or None on a miss or when the code must not be cached."""
+        if self.should_bypass(code):
+            self.bypassed += 1
+            return None
+
+        key = self.key(code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, code: str, result):
+        # 에러 결과는 일시적일 수 있으므로 저장하지 않음
+        if self.should_bypass(code) or result.type == "error":
+            return
+
+        size = len(result.content)
+        if size > self.max_entry_bytes:
+            return
+
+        key = self.key(code)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, result, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,16 @@
+# 샌드박스 세션마다 한 번 실행되는 warm-up 코드 (EXECUTOR_PRELUDE_FILE)
+# 생성된 코드가 매번 하는 import를 미리 해 두어 실행마다 드는 import 시간을 줄임
+import datetime
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib import font_manager as _font_manager
+
+from LSFetcher import LSFetcher
+
+# 폰트 캐시를 미리 만들어 첫 그래프에서 폰트 검색이 일어나지 않도록 함
+_font_manager.findfont(_font_manager.FontProperties(family=plt.rcParams["font.family"]))
+
+# 토큰을 미리 받아 두면 이후 LSFetcher()는 TokenStore에서 바로 생성됨
+_warm_fetcher = LSFetcher()
@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class SessionPool:
+    """Pool of pre-warmed execution sessions.
+
+    Subclasses define how a session is created, health-checked, reset and
+    stopped. Requests check a session out, run, and release it; released
+    sessions are reset in the background (so user state never leaks between
+    requests) before they are reused. A maintenance thread health-checks idle
+    sessions and keeps ``size`` of them available, so cold starts happen off
+    the request path.
+
+    ``prelude`` is run once on every fresh or reset session, so the imports
+    and setup it contains are already done when a request arrives.
+    """
+
+    def __init__(self, size: int, checkout_timeout: float, health_check_interval: float, prelude: str = ""):
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.prelude = prelude
+        self.prelude_seconds = None  # 마지막 prelude 실행 시간
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._total = 0  # idle + checked out + recycling
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # 첫 요청 전에 최소 한 개는 준비
+        self._replenish(limit=1)
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._closed.set()
+        self._wakeup.set()
+        while True:
+            try:
+                self._stop(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def create_session(self):
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def is_healthy(self, session) -> bool:
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def reset_session(self, session):
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def stop_session(self, session):
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def interrupt_session(self, session):
+        """Stop the code currently running in ``session`` (called from another thread)."""
+        raise NotImplementedError("Subclasses should implement this method!")
+
+    def warm_up(self, session):
+        if not self.prelude:
+            return
+
+        start_time = time.time()
+        result = session.run(self.prelude)
+        self.prelude_seconds = time.time() - start_time
+        if result.type == "error":
+            print(f"Prelude failed on {session.session_id}: {result.content}")
+
+    def checkout(self):
+        self._wakeup.set()
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise PoolExhausted(f"No session available within {self.checkout_timeout}s")
+
+    def interrupt(self, session):
+        try:
+            self.interrupt_session(session)
+        except Exception as e:
+            print(f"Failed to interrupt {session.session_id}: {e}")
+
+    def release(self, session, broken: bool = False):
+        if broken or self._closed.is_set():
+            self._discard(session)
+            return
+        threading.Thread(target=self._recycle, args=(session,), daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._total
+        idle = self._idle.qsize()
+        return {
+            "size": self.size,
+            "total": total,
+            "idle": idle,
+            "in_use": total - idle,
+            "prelude_seconds": self.prelude_seconds,
+        }
+
+    def _recycle(self, session):
+        try:
+            self.reset_session(session)
+            self.warm_up(session)
+        except Exception as e:
+            print(f"Failed to reset {session.session_id}: {e}")
+            self._discard(session)
+            return
+
+        if self.is_healthy(session):
+            self._idle.put(session)
+        else:
+            self._discard(session)
+
+    def _discard(self, session):
+        with self._lock:
+            self._total -= 1
+        self._stop(session)
+        self._wakeup.set()
+
+    def _stop(self, session):
+        try:
+            self.stop_session(session)
+        except Exception as e:
+            print(f"Failed to stop {session.session_id}: {e}")
+
+    def _replenish(self, limit: int = 0):
+        created = 0
+        while not self._closed.is_set():
+            with self._lock:
+                if self._total >= self.size or (limit and created >= limit):
+                    return
+                self._total += 1
+            try:
+                start_time = time.time()
+                session = self.create_session()
+                self.warm_up(session)
+                print(f"Session {session.session_id} warmed up in {time.time() - start_time} seconds")
+            except Exception as e:
+                with self._lock:
+                    self._total -= 1
+                print(f"Failed to start session: {e}")
+                return
+            self._idle.put(session)
+            created += 1
+
+    def _health_check(self):
+        for _ in range(self._idle.qsize()):
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if self.is_healthy(session):
+                self._idle.put(session)
+            else:
+                self._discard(session)
+
+    def _maintain(self):
+        last_check = time.time()
+        while not self._closed.is_set():
+            self._replenish()
+            if time.time() - last_check >= self.health_check_interval:
+                self._health_check()
+                last_check = time.time()
+            self._wakeup.wait(timeout=self.health_check_interval)
+            self._wakeup.clear()
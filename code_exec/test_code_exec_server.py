@@ -0,0 +1,113 @@
+import asyncio
+import importlib
+import json
+import sys
+import threading
+
+import pytest
+from codeboxapi.schema import CodeBoxOutput
+
+from executors import BaseExecutor, PooledExecutor
+
+
+class FakeExecutor(BaseExecutor):
+    name = "fake"
+
+    def run(self, code, abandoned=None, on_output=None):
+        on_output({"type": "stdout", "text": "3\n"})
+        return CodeBoxOutput(type="text", content="3\n")
+
+
+class BlockingSession:
+    """Runs until interrupted, like ``while True: pass``."""
+
+    session_id = "blocking"
+
+    def __init__(self):
+        self.interrupted = threading.Event()
+
+    def run(self, code):
+        self.interrupted.wait(5)
+        return CodeBoxOutput(type="error", content="KeyboardInterrupt")
+
+
+class BlockingPool:
+    def __init__(self):
+        self.session = BlockingSession()
+        self.released = []
+
+    def checkout(self):
+        return self.session
+
+    def release(self, session, broken: bool = False):
+        self.released.append(broken)
+
+    def interrupt(self, session):
+        session.interrupted.set()
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # 모듈 import 시 .env와 CODEBOX_API_KEY를 확인하므로 임시 디렉토리에서 불러옴
+    (tmp_path / ".env").write_text("")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CODEBOX_API_KEY", "test")
+    monkeypatch.setenv("EXECUTOR_PRELUDE_FILE", "")
+    sys.modules.pop("code_exec_server", None)
+    module = importlib.import_module("code_exec_server")
+    module.code_executor = FakeExecutor()
+    yield module
+    module.thread_pool.shutdown(wait=True)
+    sys.modules.pop("code_exec_server", None)
+
+
+def stream(server, code: str) -> list:
+    async def collect():
+        return [json.loads(line) async for line in server.stream_execution(code)]
+
+    return asyncio.run(collect())
+
+
+def test_stream_ends_with_done_and_caches_the_result(server):
+    events = stream(server, "print(1 + 2)")
+
+    assert events == [
+        {"type": "stdout", "text": "3\n"},
+        {"type": "done", "result_type": "text", "result": "3\n", "realtime": False},
+    ]
+    assert server.execute_stats["completed"] == 1
+    assert server.result_cache.get("print(1 + 2)").content == "3\n"
+
+
+def test_stream_reports_realtime_code(server):
+    events = stream(server, "print(fetcher.get_today_stock_price('005930'))")
+
+    assert events[-1]["type"] == "done"
+    assert events[-1]["realtime"] is True
+    assert server.result_cache.stats()["entries"] == 0
+
+
+def test_timed_out_run_is_interrupted_and_frees_its_slot(server, monkeypatch):
+    pool = BlockingPool()
+    server.code_executor = PooledExecutor("blocking", pool)
+    monkeypatch.setattr(server, "EXECUTE_TIMEOUT", 0.2)
+
+    async def run():
+        events = [json.loads(line) async for line in server.stream_execution("while True: pass")]
+        # 중단된 스레드가 끝나면 슬롯이 반환됨
+        for _ in range(100):
+            if server.execute_stats["running"] == 0:
+                break
+            await asyncio.sleep(0.02)
+        return events
+
+    events = asyncio.run(run())
+
+    assert events[-1] == {"type": "done", "result_type": "error", "result": None, "realtime": False}
+    assert pool.session.interrupted.is_set()
+    assert pool.released == [True]
+    assert server.execute_stats["running"] == 0 and server.execute_stats["abandoned"] == 0
+    assert not server.execute_semaphore.locked()
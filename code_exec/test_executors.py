@@ -0,0 +1,103 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from executors import PooledExecutor, done_event, result_events
+
+
+class FakeSession:
+    session_id = "fake"
+
+    def __init__(self, run):
+        self.run = run
+        self.interrupted = threading.Event()
+
+
+class FakePool:
+    def __init__(self, session):
+        self.session = session
+        self.released = []
+
+    def checkout(self):
+        return self.session
+
+    def release(self, session, broken: bool = False):
+        self.released.append(broken)
+
+    def interrupt(self, session):
+        session.interrupted.set()
+
+    def stats(self):
+        return {}
+
+
+def raise_value_error(code):
+    raise ValueError("Code or file_path must be specified!")
+
+
+def raise_runtime_error(code):
+    raise RuntimeError("sandbox connection lost")
+
+
+def test_input_error_keeps_the_session():
+    pool = FakePool(FakeSession(raise_value_error))
+    with pytest.raises(ValueError):
+        PooledExecutor("fake", pool).run("")
+    assert pool.released == [False]
+
+
+def test_sandbox_error_discards_the_session():
+    pool = FakePool(FakeSession(raise_runtime_error))
+    with pytest.raises(RuntimeError):
+        PooledExecutor("fake", pool).run("print(1)")
+    assert pool.released == [True]
+
+
+def test_abandoned_run_discards_the_session():
+    abandoned = threading.Event()
+
+    def run(code):
+        # 실행 도중 시간 초과
+        abandoned.set()
+        return SimpleNamespace(type="text", content="1")
+
+    pool = FakePool(FakeSession(run))
+    PooledExecutor("fake", pool).run("print(1)", abandoned)
+    assert pool.released == [True]
+
+
+def test_interrupt_stops_the_running_session():
+    abandoned = threading.Event()
+    session = FakeSession(lambda code: session.interrupted.wait(5) and SimpleNamespace(type="error", content="KeyboardInterrupt"))
+    pool = FakePool(session)
+    executor = PooledExecutor("fake", pool)
+    assert not executor.interrupt(abandoned)
+
+    thread = threading.Thread(target=executor.run, args=("while True: pass", abandoned))
+    thread.start()
+    while abandoned not in executor._running:
+        thread.join(0.01)
+    abandoned.set()
+    assert executor.interrupt(abandoned)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert pool.released == [True]
+    assert executor.stats()["interrupted"] == 1
+
+
+def test_run_abandoned_during_checkout_does_not_start():
+    abandoned = threading.Event()
+    abandoned.set()
+    pool = FakePool(FakeSession(raise_runtime_error))
+    with pytest.raises(TimeoutError):
+        PooledExecutor("fake", pool).run("print(1)", abandoned)
+    assert pool.released == [False]
+
+
+def test_events_for_finished_results():
+    image = SimpleNamespace(type="image/png", content="base64")
+    assert result_events(image) == [{"type": "image", "mime": "image/png", "data": "base64"}]
+    assert done_event(image)["result"] is None
+    assert done_event(None, realtime=True) == {"type": "done", "result_type": "error", "result": None, "realtime": True}
@@ -0,0 +1,71 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from result_cache import KST, ResultCache, freshness_epoch, normalize_code
+
+
+def output(content: str, type: str = "text"):
+    return SimpleNamespace(content=content, type=type)
+
+
+@pytest.fixture
+def cache():
+    return ResultCache(max_bytes=100, max_entry_bytes=60, ttl=60, intraday_seconds=300)
+
+
+def test_normalize_code_ignores_blank_lines_and_trailing_spaces():
+    assert normalize_code("a = 1  \r\n\r\nprint(a)\n") == normalize_code("a = 1\nprint(a)")
+
+
+def test_freshness_epoch_changes_intraday_but_not_after_close():
+    open_a = datetime(2024, 1, 2, 10, 0, 0, tzinfo=KST)
+    open_b = datetime(2024, 1, 2, 10, 6, 0, tzinfo=KST)
+    assert freshness_epoch(300, open_a) != freshness_epoch(300, open_b)
+
+    evening_a = datetime(2024, 1, 2, 18, 0, tzinfo=KST)
+    evening_b = datetime(2024, 1, 2, 23, 0, tzinfo=KST)
+    assert freshness_epoch(300, evening_a) == freshness_epoch(300, evening_b)
+
+
+def test_hit_after_put(cache):
+    cache.put("print(1)", output("1"))
+    assert cache.get("print(1)\n\n").content == "1"
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "LSFetcher().get_today_stock_price('005930')",
+        "LSFetcher().get_high_fluctuation_item(5, '0')",
+        "LSFetcher().get_high_increase_rate_item(5)",
+        "LSFetcher().get_high_decrease_rate_item(5)",
+        "import yfinance as yf\nprint(yf.Ticker('AAPL').info)",
+    ],
+)
+def test_realtime_code_is_not_cached(cache, code):
+    assert cache.should_bypass(code)
+    cache.put(code, output("42"))
+    assert cache.get(code) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_errors_are_not_cached(cache):
+    cache.put("1/0", output("ZeroDivisionError", type="error"))
+    assert cache.get("1/0") is None
+
+
+def test_size_bound_evicts_least_recently_used(cache):
+    cache.put("a", output("x" * 40))
+    cache.put("b", output("y" * 40))
+    cache.get("a")
+    cache.put("c", output("z" * 40))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["bytes"] <= 100
+
+    cache.put("big", output("w" * 61))
+    assert cache.get("big") is None
@@ -0,0 +1,75 @@
+"""Microbenchmark: code-fence detection over a streamed reply.
+
+Compares the old loop (``buffer += content`` plus ``in`` checks over the
+whole buffer on every chunk) with ``CodeFenceParser``, which scans each chunk
+once. Replies are long prose, one Python block and a trailing explanation,
+split into 4-character chunks like the OpenAI stream.
+
+Usage (from llm/):
+    python bench_code_fence.py [--runs N]
+"""
+import argparse
+import time
+
+from code_fence import CodeFenceParser
+
+CODE = "```python\nfrom LSFetcher import LSFetcher\nfetcher = LSFetcher()\nprint(fetcher.get_stock_chart_info('005930'))\n```"
+
+
+def legacy_chat_completion(chunks):
+    # 예전 chat_completion의 버퍼링 루프 그대로 (비교용)
+    buffer = ""
+    stop_condition_met = [False, False]
+    consumed = 0
+    for content in chunks:
+        consumed += 1
+        buffer += content
+        if "```python" in buffer:
+            stop_condition_met[0] = True
+        elif stop_condition_met[0] and "```" in buffer:
+            break
+    return buffer, consumed
+
+
+def parser_chat_completion(chunks):
+    parser = CodeFenceParser()
+    consumed = 0
+    for content in chunks:
+        consumed += 1
+        if parser.feed(content) is not None:
+            break
+    return parser.code, consumed
+
+
+def make_chunks(prose_chars: int, tail_chars: int):
+    prose = ("삼성전자의 주가 흐름을 분석하기 위해 일봉 데이터를 조회합니다. " * (prose_chars // 30 + 1))[:prose_chars]
+    tail = ("위 코드는 10년간의 종가를 그래프로 그립니다. " * (tail_chars // 25 + 1))[:tail_chars]
+    text = f"{prose}\n{CODE}\n{tail}"
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def timed(fn, runs: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start_time) / runs
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--runs", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    for prose_chars, tail_chars in ((2_000, 1_000), (20_000, 5_000), (100_000, 20_000)):
+        chunks = make_chunks(prose_chars, tail_chars)
+        _, legacy_consumed = legacy_chat_completion(chunks)
+        code, parser_consumed = parser_chat_completion(chunks)
+        assert code and code.startswith("from LSFetcher")
+
+        legacy = timed(lambda: legacy_chat_completion(chunks), args.runs)
+        new = timed(lambda: parser_chat_completion(chunks), args.runs)
+        print(
+            f"prose={prose_chars:>7} tail={tail_chars:>6} chunks={len(chunks):>6} | "
+            f"legacy {legacy * 1000:8.2f}ms, read {legacy_consumed:>6} chunks | "
+            f"parser {new * 1000:6.2f}ms, read {parser_consumed:>6} chunks"
+        )
@@ -0,0 +1,167 @@
+"""Load benchmark: concurrent /chat-completion throughput of one llm_server worker.
+
+Upstreams are replaced by a fake server with fixed latencies so the numbers
+measure the server's concurrency, not OpenAI's.
+
+Usage (from llm/):
+    # 1. 가짜 업스트림 (OpenAI, Serper, code_exec) 실행
+    python bench_load.py fake-upstream --port 9000 --latency 0.5
+
+    # 2. 가짜 업스트림을 바라보는 llm_server 워커 1개 실행
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 SERPER_URL=http://127.0.0.1:9000/news \\
+    EXECUTOR_URL=http://127.0.0.1:9000/execute \\
+        gunicorn -k uvicorn.workers.UvicornWorker llm_server:app --bind 127.0.0.1:8080 --workers 1
+
+    # 3. 동시 요청 수를 늘려가며 측정
+    python bench_load.py run --url http://127.0.0.1:8080/chat-completion --concurrency 1,4,16,64
+
+    # SSE 엔드포인트는 첫 바이트까지의 시간(TTFB)도 측정
+    python bench_load.py run --url http://127.0.0.1:8080/chat-completion/stream --stream
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+GENERATED_CODE = "```python\nprint(sum(range(10)))\n```"
+
+
+def create_fake_upstream(latency: float):
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+
+    def completion_chunk(content: str):
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "gpt-4",
+            "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "삼성전자"},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+
+        async def stream():
+            # 토큰 단위로 나눠 latency 동안 흘려보냄
+            tokens = [GENERATED_CODE[i : i + 4] for i in range(0, len(GENERATED_CODE), 4)]
+            for token in tokens:
+                await asyncio.sleep(latency / len(tokens))
+                yield f"data: {json.dumps(completion_chunk(token))}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/news")
+    async def news():
+        await asyncio.sleep(latency)
+        return {"news": [{"title": "bench", "link": "https://example.com"}]}
+
+    @app.post("/execute")
+    async def execute():
+        async def events():
+            await asyncio.sleep(latency)
+            yield json.dumps({"type": "stdout", "text": "45\n"}) + "\n"
+            yield json.dumps({"type": "done", "result_type": "text", "result": "45\n"}) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    return app
+
+
+def percentile(values, q: float) -> float:
+    return values[max(int(len(values) * q) - 1, 0)] if values else 0.0
+
+
+async def run_level(url: str, concurrency: int, total: int, timeout: float, stream: bool):
+    latencies, ttfbs, errors = [], [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            start_time = time.perf_counter()
+            try:
+                # 응답 캐시에 걸리지 않도록 요청마다 다른 문장 사용
+                body = {"user_message": f"삼성전자 종가 알려줘 #{i}"}
+                if stream:
+                    async with client.stream("POST", url, json=body) as response:
+                        response.raise_for_status()
+                        first_byte = None
+                        async for _ in response.aiter_bytes():
+                            first_byte = first_byte or time.perf_counter() - start_time
+                    ttfbs.append(first_byte)
+                else:
+                    response = await client.post(url, json=body)
+                    response.raise_for_status()
+                latencies.append(time.perf_counter() - start_time)
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+    ttfbs.sort()
+    line = (
+        f"concurrency={concurrency:<4} requests={total:<4} errors={errors:<3} "
+        f"throughput={len(latencies) / elapsed:7.2f} req/s "
+        f"p50={statistics.median(latencies) if latencies else 0.0:6.2f}s p95={percentile(latencies, 0.95):6.2f}s"
+    )
+    if stream:
+        line += f" ttfb_p50={statistics.median(ttfbs) if ttfbs else 0.0:6.2f}s ttfb_p95={percentile(ttfbs, 0.95):6.2f}s"
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fake_parser = subparsers.add_parser("fake-upstream")
+    fake_parser.add_argument("--port", type=int, default=9000)
+    fake_parser.add_argument("--latency", type=float, default=0.5, help="seconds per upstream call")
+
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("--url", default="http://127.0.0.1:8080/chat-completion")
+    run_parser.add_argument("--concurrency", default="1,4,16,64")
+    run_parser.add_argument("--requests-per-level", type=int, default=None, help="default: 4 x concurrency")
+    run_parser.add_argument("--timeout", type=float, default=300)
+    run_parser.add_argument("--stream", action="store_true", help="read an SSE response and measure TTFB")
+
+    args = parser.parse_args()
+
+    if args.command == "fake-upstream":
+        import uvicorn
+
+        uvicorn.run(create_fake_upstream(args.latency), host="127.0.0.1", port=args.port, log_level="warning")
+    else:
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            total = args.requests_per_level or concurrency * 4
+            asyncio.run(run_level(args.url, concurrency, total, args.timeout, args.stream))
@@ -0,0 +1,92 @@
+"""Microbenchmark: regex-sniffing result detection vs. typed event dispatch.
+
+The legacy path matched a full-string base64 regex over the execution result
+and then tried ``Image.open``; the typed path reads the tag code_exec attaches
+to each output part.
+
+Usage (from llm/):
+    python bench_result_dispatch.py [--runs N]
+"""
+import argparse
+import base64
+import json
+import random
+import re
+import string
+import time
+from io import BytesIO
+
+from execution_result import parse_execution_events
+from PIL import Image
+
+
+def legacy_distinguish_and_handle(input_str):
+    # 예전 llm_wrapper.distinguish_and_handle 그대로 (비교용)
+    base64_pattern = r"^(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$"
+
+    if encoded_bytes_group := re.match(base64_pattern, input_str):
+        try:
+            encoded_bytes = encoded_bytes_group.group(0)
+            decoded_bytes = base64.b64decode(encoded_bytes)
+            img = Image.open(BytesIO(decoded_bytes))
+            return encoded_bytes, img
+        except Exception:
+            return input_str, None
+    return input_str, None
+
+
+def make_png(width: int, height: int) -> str:
+    img = Image.effect_noise((width, height), 64).convert("RGB")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def make_cases():
+    random.seed(0)
+    alphabet = string.ascii_letters + string.digits
+    image = make_png(1200, 800)
+    return {
+        # 공백이 없는 긴 텍스트는 정규식이 끝까지 훑어야 함
+        "text 4MB (alnum)": ("text", "".join(random.choices(alphabet, k=4 * 1024 * 1024))),
+        "text 4MB (table)": ("text", "date,open,close\n" * (4 * 1024 * 1024 // 16)),
+        "short alnum 'KOSPI200'": ("text", "KOSPI200"),
+        f"image {len(image) // 1024}KB": ("image/png", image),
+    }
+
+
+def as_events(result_type: str, content: str):
+    if result_type.startswith("image/"):
+        events = [{"type": "image", "mime": result_type, "data": content}]
+        done = {"type": "done", "result_type": result_type, "result": None}
+    else:
+        events = [{"type": "stdout", "text": content}]
+        done = {"type": "done", "result_type": result_type, "result": content}
+    return [json.dumps(event) for event in events + [done]]
+
+
+def timed(fn, runs: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start_time) / runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, (result_type, content) in make_cases().items():
+        lines = as_events(result_type, content)
+
+        legacy_output, legacy_image = legacy_distinguish_and_handle(content)
+        typed_output, typed_image, _, _ = parse_execution_events(lines)
+
+        # 파싱(json.loads)은 두 경로 모두 필요하므로 새 경로에만 포함해도 불리하지 않음
+        legacy = timed(lambda: legacy_distinguish_and_handle(content), args.runs)
+        typed = timed(lambda: parse_execution_events(lines), args.runs)
+        print(
+            f"{name:<24} legacy={legacy * 1000:9.3f}ms (image={legacy_image is not None}) "
+            f"typed={typed * 1000:9.3f}ms (image={typed_image is not None})"
+        )
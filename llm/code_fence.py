@@ -0,0 +1,77 @@
+TEXT, INFO, CODE, SKIP, DONE = "text", "info", "code", "skip", "done"
+
+FENCE = "```"
+
+# 코드로 실행할 펜스 언어 (빈 문자열은 언어 표기 없는 펜스)
+CODE_LANGUAGES = ("python", "py", "")
+
+
+def trailing_backticks(data: str) -> int:
+    """Number of backticks at the end of ``data`` that could start a fence in the next chunk."""
+    return len(data) - len(data.rstrip("`"))
+
+
+class CodeFenceParser:
+    """Incremental detector of the first fenced Python block in a token stream.
+
+    Each chunk is scanned once; only up to two trailing backticks are carried
+    over to the next chunk, so the cost is linear in the response length.
+    Fences with another info string (e.g. an ``Execution Result`` block) are
+    skipped. ``feed`` returns the code the moment its closing fence arrives.
+    """
+
+    def __init__(self):
+        self.state = TEXT
+        self.parts = []
+        self.code = None
+        self._pending = ""
+        self._info = []
+        self._code = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def feed(self, chunk: str):
+        """Consume ``chunk``; returns the code block once it is complete, otherwise None."""
+        self.parts.append(chunk)
+        if self.state == DONE:
+            return None
+
+        data, self._pending = self._pending + chunk, ""
+        while data:
+            if self.state == TEXT:
+                index = data.find(FENCE)
+                if index < 0:
+                    self._pending = data[len(data) - trailing_backticks(data) :]
+                    return None
+                data = data[index + len(FENCE) :]
+                self.state, self._info = INFO, []
+
+            elif self.state == INFO:
+                index = data.find("\n")
+                if index < 0:
+                    self._info.append(data)
+                    return None
+                self._info.append(data[:index])
+                data = data[index + 1 :]
+                language = "".join(self._info).strip().lower()
+                self.state = CODE if language in CODE_LANGUAGES else SKIP
+
+            else:  # CODE, SKIP
+                index = data.find(FENCE)
+                if index < 0:
+                    keep = trailing_backticks(data)
+                    if self.state == CODE:
+                        self._code.append(data[: len(data) - keep])
+                    self._pending = data[len(data) - keep :]
+                    return None
+                if self.state == SKIP:
+                    data = data[index + len(FENCE) :]
+                    self.state = TEXT
+                    continue
+                self._code.append(data[:index])
+                self.state = DONE
+                self.code = "".join(self._code).strip()
+                return self.code
+        return None
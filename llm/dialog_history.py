@@ -0,0 +1,139 @@
+from system_prompt import count_tokens
+
+OUTPUT_PLACEHOLDER = "[output omitted: {chars} chars]"
+
+
+def content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    # 이미지 파트는 토큰 계산에서 제외 (텍스트 파트만)
+    return " ".join(part["text"] for part in content if part["type"] == "text")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of ``text``; without a tokenizer, one token per three UTF-8 bytes.
+
+    The fallback is deliberately generous (about one token per Hangul
+    syllable, more than the real rate for English) so the budget errs on
+    the side of compacting early.
+    """
+    if (tokens := count_tokens(text)) is not None:
+        return tokens
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def truncate_output(output: str, max_chars: int) -> str:
+    """Keep the head and tail of a long execution output, where tables and tracebacks carry the signal."""
+    if len(output) <= max_chars:
+        return output
+    half = max_chars // 2
+    return f"{output[:half]}\n... [{len(output) - 2 * half} chars truncated] ...\n{output[-half:]}"
+
+
+def execution_message(generated_text: str, output: str) -> str:
+    return f"{generated_text}\n```Execution Result:\n{output}\n```"
+
+
+class DialogHistory:
+    """Chat messages kept under a prompt-token budget.
+
+    Execution outputs are cut to ``max_output_chars`` when they are added.
+    Whenever the total goes over ``token_budget``, the oldest execution
+    outputs are replaced with a placeholder first, then the oldest messages
+    are dropped two at a time (an assistant turn with the user message that
+    answers it), so no feedback message is left without its turn.
+
+    Pinned messages (the system message, the user's question) and the tail
+    starting at the latest execution turn (or, without one, the latest user
+    message) are never compacted or dropped: the model still needs the
+    latest result and its feedback to write the conclusion.
+    Each message's token count is stored with it, so ``turn_tokens`` reports
+    per-turn accounting without re-encoding.
+    """
+
+    def __init__(self, system_message: str, token_budget: int, max_output_chars: int):
+        self.token_budget = token_budget
+        self.max_output_chars = max_output_chars
+        self._entries = []  # {"message", "tokens", "text", "output_chars", "pinned", "compacted"}
+        self.compacted = 0
+        self.dropped = 0
+        self._entries.append(self._entry("system", system_message, pinned=True))
+
+    @staticmethod
+    def _entry(role: str, content, text: str = None, output_chars: int = None, pinned: bool = False) -> dict:
+        # 메시지마다 역할/구분 토큰 3개가 추가됨
+        return {
+            "message": {"role": role, "content": content},
+            "tokens": 3 + estimate_tokens(content_text(content)),
+            "text": text,
+            "output_chars": output_chars,
+            "pinned": pinned,
+            "compacted": False,
+        }
+
+    def set_system(self, system_message: str):
+        self._entries[0] = self._entry("system", system_message, pinned=True)
+        self._fit()
+
+    def append(self, role: str, content, pin: bool = False):
+        self._entries.append(self._entry(role, content, pinned=pin))
+        self._fit()
+
+    def append_execution(self, generated_text: str, output: str):
+        """Add the assistant turn with its (truncated) execution result."""
+        content = execution_message(generated_text, truncate_output(output, self.max_output_chars))
+        self._entries.append(self._entry("assistant", content, text=generated_text, output_chars=len(output)))
+        self._fit()
+
+    def messages(self) -> list[dict]:
+        return [entry["message"] for entry in self._entries]
+
+    def total_tokens(self) -> int:
+        return 3 + sum(entry["tokens"] for entry in self._entries)  # 답변 시작 토큰 3개 포함
+
+    def _compact(self, entry: dict):
+        placeholder = OUTPUT_PLACEHOLDER.format(chars=entry["output_chars"])
+        compacted = self._entry("assistant", execution_message(entry["text"], placeholder))
+        entry.update(message=compacted["message"], tokens=compacted["tokens"], compacted=True)
+        self.compacted += 1
+
+    def _tail_start(self) -> int:
+        """Index where the protected tail begins: the latest execution turn, else the latest user message."""
+        executions = [i for i, e in enumerate(self._entries) if e["output_chars"] is not None]
+        if executions:
+            return executions[-1]
+        users = [i for i, e in enumerate(self._entries) if e["message"]["role"] == "user"]
+        return users[-1] if users else len(self._entries) - 1
+
+    def _fit(self):
+        while self.total_tokens() > self.token_budget:
+            tail = self._tail_start()
+            # 1. 오래된 실행 결과부터 자리표시자로 대체 (최신 실행 결과는 유지)
+            entry = next(
+                (e for e in self._entries[1:tail] if e["output_chars"] is not None and not e["compacted"]), None
+            )
+            if entry is not None:
+                self._compact(entry)
+                continue
+            # 2. 그래도 넘치면 오래된 메시지부터 두 개씩 (턴과 그에 대한 응답) 삭제
+            index = next((i for i in range(1, tail) if not self._entries[i]["pinned"]), None)
+            if index is None:
+                return
+            count = 2 if index + 1 < tail and not self._entries[index + 1]["pinned"] else 1
+            del self._entries[index : index + count]
+            self.dropped += count
+
+    def turn_tokens(self) -> list[dict]:
+        """Per-message token accounting, oldest first."""
+        return [
+            {"role": entry["message"]["role"], "tokens": entry["tokens"], "compacted": entry["compacted"]}
+            for entry in self._entries
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "history_tokens": self.total_tokens(),
+            "history_messages": len(self._entries),
+            "history_compacted": self.compacted,
+            "history_dropped": self.dropped,
+        }
@@ -0,0 +1,79 @@
+import json
+from typing import NamedTuple
+
+
+class ExecutionOutput(NamedTuple):
+    text: str
+    image: str | None
+    failed: bool = False  # 에러/시간 초과로 끝난 실행
+    realtime: bool = False  # 실시간 데이터를 읽은 코드 (code_exec가 판단)
+
+
+class ExecutionEventReader:
+    """Accumulates code_exec's NDJSON events into an ``ExecutionOutput``.
+
+    Each event carries a type tag (``stdout``, ``image``, ``error``, ``done``),
+    so dispatch is a single lookup per event and payloads are never scanned.
+    ``on_image(image)`` is called as soon as each image arrives, so the
+    caller can start work on it and drop work for an earlier image.
+    """
+
+    def __init__(self, on_image=None):
+        self.texts = []
+        self.image = None
+        self.on_image = on_image
+        self.result = None
+        self.realtime = False
+
+    def feed(self, line) -> bool:
+        """Handle one event line; returns True once the result is final."""
+        if not line:
+            return False
+        event = json.loads(line)
+        event_type = event["type"]
+
+        if event_type == "stdout":
+            self.texts.append(event["text"])
+        elif event_type == "image":
+            self.image = event["data"]
+            if self.on_image is not None:
+                self.on_image(self.image)
+        elif event_type == "error":
+            # 에러가 나면 실행 종료를 기다리지 않고 바로 반환
+            print(f"Execution failed: {event['text']}")
+            self.result = ExecutionOutput(event["text"], None, failed=True)
+        elif event_type == "done":
+            self.realtime = event.get("realtime", False)
+            if event["result_type"].startswith("image/"):
+                self.result = ExecutionOutput("", self.image, realtime=self.realtime)
+            else:
+                failed = event["result_type"] == "error"
+                text = event["result"] or "".join(self.texts)
+                self.result = ExecutionOutput(text, None, failed=failed, realtime=self.realtime)
+        return self.result is not None
+
+    def finish(self) -> ExecutionOutput:
+        return self.result or ExecutionOutput("".join(self.texts), self.image, realtime=self.realtime)
+
+
+def parse_execution_events(lines, on_image=None):
+    """Read code_exec's NDJSON event stream into an ``ExecutionOutput``.
+
+    ``image`` is the base64 payload of the last image part, or None. An error
+    event returns right away (with ``failed`` set) instead of waiting for
+    the run to end.
+    """
+    reader = ExecutionEventReader(on_image)
+    for line in lines:
+        if reader.feed(line):
+            break
+    return reader.finish()
+
+
+async def aparse_execution_events(lines, on_image=None):
+    """Async counterpart of ``parse_execution_events`` for ``aiter_lines()`` streams."""
+    reader = ExecutionEventReader(on_image)
+    async for line in lines:
+        if reader.feed(line):
+            break
+    return reader.finish()
@@ -0,0 +1,47 @@
+import base64
+import struct
+from io import BytesIO
+
+from decouple import config
+from PIL import Image
+
+# 비전 모델로 보내기 전 이미지 축소/재압축 설정
+VISION_IMAGE_MAX_SIDE = config("VISION_IMAGE_MAX_SIDE", default=1024, cast=int)
+VISION_IMAGE_FORMAT = config("VISION_IMAGE_FORMAT", default="png").lower()  # png, jpeg, webp
+VISION_IMAGE_QUALITY = config("VISION_IMAGE_QUALITY", default=85, cast=int)
+
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+
+def png_size(image_b64: str):
+    """Width and height from the PNG IHDR chunk, decoding only the first 24 bytes."""
+    header = base64.b64decode(image_b64[:32])
+    if header[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def to_vision_data_url(image_b64: str) -> str:
+    """Data URL for the vision call, downscaled to ``VISION_IMAGE_MAX_SIDE`` and re-encoded.
+
+    A PNG that already fits and should stay PNG is passed through without
+    being decoded at all; otherwise the payload is decoded exactly once.
+    """
+    size = png_size(image_b64)
+    if VISION_IMAGE_FORMAT == "png" and size and max(size) <= VISION_IMAGE_MAX_SIDE:
+        return f"data:image/png;base64,{image_b64}"
+
+    img = Image.open(BytesIO(base64.b64decode(image_b64)))
+    if VISION_IMAGE_MAX_SIDE > 0 and max(img.size) > VISION_IMAGE_MAX_SIDE:
+        img.thumbnail((VISION_IMAGE_MAX_SIDE, VISION_IMAGE_MAX_SIDE), Image.LANCZOS)
+
+    if VISION_IMAGE_FORMAT == "jpeg" and img.mode != "RGB":
+        # JPEG는 투명도를 지원하지 않으므로 흰 배경에 합성
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.convert("RGBA").getchannel("A"))
+        img = background
+
+    buffer = BytesIO()
+    img.save(buffer, format=VISION_IMAGE_FORMAT.upper(), quality=VISION_IMAGE_QUALITY, optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:{MIME_TYPES[VISION_IMAGE_FORMAT]};base64,{encoded}"
@@ -0,0 +1,220 @@
+import csv
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+
+class Listing(NamedTuple):
+    name: str
+    shcode: str
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace, so aliases match regardless of case or spacing."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+# 짧은 한글 별칭 ("한전") 뒤에 올 수 있는 조사
+PARTICLES = (
+    "은", "는", "이", "가", "을", "를", "의", "도", "만", "와", "과", "랑", "이랑", "하고",
+    "로", "으로", "에", "에서", "까지", "부터", "보다", "처럼",
+)
+SHORT_ALIAS_LENGTH = 2
+
+
+def is_ascii_alnum(char: str) -> bool:
+    return char.isascii() and char.isalnum()
+
+
+def is_hangul(char: str) -> bool:
+    return "가" <= char <= "힣"
+
+
+def ends_word(text: str, end: int) -> bool:
+    return end == len(text) or not text[end].isalnum()
+
+
+def at_boundary(text: str, start: int, end: int) -> bool:
+    """Whether ``text[start:end]`` stands as a word rather than inside one.
+
+    Latin aliases must be whole words ("task" does not contain "sk"). Hangul
+    aliases must start a word and may run into what follows ("삼성전자주가"),
+    except short ones, which may only be followed by a particle ("한전의"),
+    so "안전한전략" does not contain "한전".
+    """
+    if is_ascii_alnum(text[start]) and start > 0 and is_ascii_alnum(text[start - 1]):
+        return False
+    if is_ascii_alnum(text[end - 1]) and end < len(text) and is_ascii_alnum(text[end]):
+        return False
+    if not is_hangul(text[start]):
+        return True
+
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end - start > SHORT_ALIAS_LENGTH or not all(map(is_hangul, text[start:end])):
+        return True
+    return ends_word(text, end) or any(
+        text.startswith(particle, end) and ends_word(text, end + len(particle)) for particle in PARTICLES
+    )
+
+
+class AliasIndex:
+    """Aho-Corasick automaton over company names and aliases.
+
+    A single pass over the message finds every alias it contains; the
+    leftmost match wins, and among matches starting at the same position the
+    longest one (so "LG전자" beats "LG"). Matches must sit on word
+    boundaries as described in ``at_boundary``.
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # state -> [(alias length, Listing)]
+        self.aliases = 0
+
+    def add(self, alias: str, listing: Listing):
+        alias = normalize_text(alias)
+        if not alias:
+            return
+
+        # "KOSPI 200"과 "KOSPI200" 모두 매칭되도록 공백 없는 형태도 추가
+        for variant in {alias, alias.replace(" ", "")}:
+            state = 0
+            for char in variant:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state].append((len(variant), listing))
+            self.aliases += 1
+
+    def build(self):
+        """Compute failure links; call once after all aliases are added."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str):
+        """Yield ``(start, end, listing)`` for every alias occurring in ``text``."""
+        text = normalize_text(text)
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            for length, listing in self._output[state]:
+                start = end - length
+                if at_boundary(text, start, end):
+                    yield start, end, listing
+
+    def lookup(self, text: str):
+        """Leftmost-longest listing mentioned in ``text``, or None."""
+        best = None
+        for start, end, listing in self.find(text):
+            if best is None or (start, -end) < (best[0], -best[1]):
+                best = (start, end, listing)
+        return best[2] if best else None
+
+
+def load_alias_index(seed_path: str, listing_path: str = "") -> AliasIndex:
+    """Build the index from the seed alias CSV and an optional full listing CSV.
+
+    The seed CSV has ``name,shcode,aliases`` columns with ``|``-separated
+    aliases. The listing CSV only needs ``hname`` and ``shcode`` columns, so
+    the ``t8436`` (주식종목조회) output block can be saved as is.
+    """
+    index = AliasIndex()
+
+    if listing_path:
+        if os.path.isfile(listing_path):
+            with open(listing_path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    index.add(row["hname"], Listing(row["hname"], row["shcode"]))
+        else:
+            print(f"Listing file not found: {listing_path}")
+
+    with open(seed_path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            listing = Listing(row["name"], row["shcode"])
+            index.add(row["name"], listing)
+            for alias in filter(None, row["aliases"].split("|")):
+                index.add(alias, listing)
+
+    index.build()
+    return index
+
+
+class KeywordExtractor:
+    """Search keyword extraction in three tiers: local alias index, LRU cache, LLM.
+
+    Only LLM answers are cached, keyed by the normalized message. Per-tier
+    counts and seconds are kept so ``stats()`` can report how often each tier
+    answers and roughly how much LLM latency the first two tiers saved.
+    """
+
+    TIERS = ("local", "cache", "llm")
+
+    def __init__(self, index: AliasIndex, cache_size: int):
+        self.index = index
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.counts = dict.fromkeys(self.TIERS, 0)
+        self.seconds = dict.fromkeys(self.TIERS, 0.0)
+
+    def _record(self, tier: str, start_time: float):
+        self.counts[tier] += 1
+        self.seconds[tier] += time.perf_counter() - start_time
+
+    async def extract(self, user_message: str, llm_extract) -> str:
+        """Keyword for ``user_message``; ``llm_extract(user_message)`` is awaited only on a full miss."""
+        start_time = time.perf_counter()
+
+        if listing := self.index.lookup(user_message):
+            self._record("local", start_time)
+            return listing.name
+
+        key = normalize_text(user_message)
+        if (keyword := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            self._record("cache", start_time)
+            return keyword
+
+        keyword = await llm_extract(user_message)
+        self._record("llm", start_time)
+
+        self._cache[key] = keyword
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return keyword
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        llm_mean = self.seconds["llm"] / self.counts["llm"] if self.counts["llm"] else None
+        stats = {
+            "requests": total,
+            "counts": self.counts,
+            "rates": {tier: count / total if total else 0.0 for tier, count in self.counts.items()},
+            "mean_seconds": {
+                tier: self.seconds[tier] / count if count else None for tier, count in self.counts.items()
+            },
+            "index_aliases": self.index.aliases,
+            "cache_entries": len(self._cache),
+        }
+        # LLM 평균 지연 시간 기준으로 로컬/캐시가 절약한 시간 추정
+        if llm_mean is not None:
+            answered = self.counts["local"] + self.counts["cache"]
+            stats["latency_saved_seconds"] = answered * llm_mean - self.seconds["local"] - self.seconds["cache"]
+        return stats
@@ -1,12 +1,59 @@
+import asyncio
 import json
+import time
 
-from fastapi import FastAPI, Response
+import httpx
+from decouple import config
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from llm_wrapper import ChatResponse, GPTCodeGenerator, GPTNewsGenerator
+from fastapi.responses import StreamingResponse
+from llm_wrapper import (
+    HTTP_CLIENT,
+    KEYWORD_EXTRACTOR,
+    ChatResponse,
+    GPTCodeGenerator,
+    GPTNewsGenerator,
+    create_openai_client,
+)
+from openai import APITimeoutError
 from pydantic import BaseModel
+from response_cache import ResponseCache
+
+# 요청마다 클라이언트를 만들지 않고 워커 전체에서 연결 풀을 공유
+openai_client = create_openai_client()
+
+
+def entity_of(message: str):
+    listing = KEYWORD_EXTRACTOR.index.lookup(message)
+    return listing.name if listing else None
+
+
+# 비슷한 질문에 대한 전체 답변 캐시 (실시간 시세를 쓴 답변은 짧게 유지)
+response_cache = ResponseCache(
+    max_bytes=config("RESPONSE_CACHE_MAX_BYTES", default=64 * 1024 * 1024, cast=int),
+    max_entry_bytes=config("RESPONSE_CACHE_MAX_ENTRY_BYTES", default=8 * 1024 * 1024, cast=int),
+    ttl=config("RESPONSE_CACHE_TTL", default=1800.0, cast=float),
+    realtime_ttl=config("RESPONSE_CACHE_REALTIME_TTL", default=60.0, cast=float),
+    # 0이면 정규화된 문장이 같을 때만 적중, 0~1이면 char bigram 유사도로도 적중
+    similarity=config("RESPONSE_CACHE_SIMILARITY", default=0.0, cast=float),
+    entity_of=entity_of,
+)
 
 app = FastAPI()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await openai_client.close()
+    await HTTP_CLIENT.aclose()
+
+@app.get("/metrics")
+async def metrics():
+    return {"keyword_extractor": KEYWORD_EXTRACTOR.stats()}
+
+@app.get("/admin/response-cache")
+async def response_cache_stats():
+    return response_cache.stats()
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -29,14 +76,95 @@ async def options():
 async def chat_completion(request: ChatCompletionRequest) -> ChatResponse:
     user_message = request.user_message
 
-    gpt_interpreter = GPTCodeGenerator()
-    return gpt_interpreter.chat(user_message)
+    start_time = time.perf_counter()
+    if (cached := response_cache.get(user_message)) is not None:
+        elapsed = round(time.perf_counter() - start_time, 3)
+        return cached.model_copy(update={"timings": {"response_cache": elapsed, "total": elapsed}, "usage": {}, "turn_tokens": None})
+
+    gpt_interpreter = GPTCodeGenerator(openai_client)
+    try:
+        response = await gpt_interpreter.chat(user_message)
+    except (APITimeoutError, httpx.TimeoutException) as e:
+        print(f"An error occurred: {e}")
+        raise HTTPException(status_code=504, detail=f"Upstream timed out: {e}")
+
+    response_cache.put(user_message, response)
+    return response
+
+def sse_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def response_events(response: ChatResponse):
+    """Typed events equivalent to a finished response, used to replay cache hits."""
+    if response.generated_code:
+        yield "code", {"code": response.generated_code}
+    if response.code_exec_result.image:
+        yield "image", {"image": response.code_exec_result.image}
+        yield "description", {"text": response.code_exec_result.text}
+    elif response.code_exec_result.text:
+        yield "execution", {"text": response.code_exec_result.text}
+    yield "news", {"news_result": response.news_result}
+
+async def stream_chat(user_message: str):
+    """SSE events: tokens as they arrive, then code/image/execution/description/news, then done.
+
+    ``done`` carries the stage timings plus ``ttfb``, the seconds until the
+    first event was sent, and the per-turn prompt tokens of the dialog.
+    """
+    start_time = time.perf_counter()
+
+    if (cached := response_cache.get(user_message)) is not None:
+        for event_type, data in response_events(cached):
+            yield sse_event(event_type, data)
+        elapsed = round(time.perf_counter() - start_time, 3)
+        yield sse_event("done", {"timings": {"response_cache": elapsed, "ttfb": elapsed, "total": elapsed}, "cached": True})
+        return
+
+    events = asyncio.Queue()
+    gpt_interpreter = GPTCodeGenerator(openai_client)
+    task = asyncio.create_task(
+        gpt_interpreter.chat(user_message, on_event=lambda event_type, data: events.put_nowait((event_type, data)))
+    )
+    # 답변 생성이 끝나면 (성공/실패 모두) None으로 스트림 종료를 알림
+    task.add_done_callback(lambda _: events.put_nowait(None))
+
+    ttfb = None
+    try:
+        while (event := await events.get()) is not None:
+            if ttfb is None:
+                ttfb = round(time.perf_counter() - start_time, 3)
+            yield sse_event(*event)
+        response = task.result()
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        status_code = 504 if isinstance(e, (APITimeoutError, httpx.TimeoutException)) else 500
+        yield sse_event("error", {"status_code": status_code, "detail": str(e)})
+        return
+    finally:
+        # 클라이언트가 연결을 끊으면 답변 생성도 중단
+        task.cancel()
+
+    response_cache.put(user_message, response)
+    print(f"=== Time To First Byte: {ttfb} ===")
+    yield sse_event("done", {"timings": {**response.timings, "ttfb": ttfb}, "usage": response.usage, "turn_tokens": response.turn_tokens, "cached": False})
+
+@app.post("/chat-completion/stream")
+async def chat_completion_stream(request: ChatCompletionRequest):
+    return StreamingResponse(
+        stream_chat(request.user_message),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/news")
 async def chat_news(request: ChatCompletionRequest) -> ChatResponse:
     user_message = request.user_message
-    gpt_interpreter = GPTNewsGenerator()
-    result = gpt_interpreter.chat(user_message)
+    gpt_interpreter = GPTNewsGenerator(openai_client)
+    try:
+        result = await gpt_interpreter.chat(user_message)
+    except (APITimeoutError, httpx.TimeoutException) as e:
+        print(f"An error occurred: {e}")
+        raise HTTPException(status_code=504, detail=f"Upstream timed out: {e}")
     return result
 
 if __name__ == "__main__":
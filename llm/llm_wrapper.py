@@ -1,61 +1,121 @@
-import base64
+import asyncio
 import json
 import os
-import re
 import sys
 import time
-from collections import deque
-from io import BytesIO
+from contextlib import contextmanager
 
-import requests
+import httpx
+from code_fence import CodeFenceParser
 from decouple import config
-from openai import OpenAI
-from PIL import Image
+from dialog_history import DialogHistory, estimate_tokens
+from execution_result import aparse_execution_events
+from image_utils import to_vision_data_url
+from keyword_extractor import KeywordExtractor, load_alias_index
+from openai import AsyncOpenAI
 from pydantic import BaseModel
+from system_prompt import count_message_tokens, count_tokens, load_system_prompt
 from termcolor import colored
 
 
 class CodeExecResult(BaseModel):
     text: str | None
     image: str | None
+    error: bool = False  # 실행이 에러/시간 초과로 끝남 (text는 traceback)
+    realtime: bool = False  # 실시간 데이터를 읽은 코드
 
 
 class ChatResponse(BaseModel):
     generated_code: str
     code_exec_result: CodeExecResult
     news_result: dict
+    timings: dict[str, float] | None = None
+    usage: dict[str, int] | None = None
+    turn_tokens: list[dict] | None = None
 
 
 assert os.path.isfile(".env"), ".env file not found!"
 
-with open("code_interpreter_system_prompt.txt", "r") as f:
-    CODE_INTERPRETER_SYSTEM_PROMPT = f.read()
+# LSFetcher 소스의 시그니처/docstring으로 시스템 프롬프트 생성 (소스가 없으면 커밋된 txt 사용)
+SYSTEM_PROMPT = load_system_prompt(
+    config("LSFETCHER_SOURCE", default="../code_exec/fetch/LSFetcher.py"),
+    "code_interpreter_system_prompt.txt",
+)
+CODE_INTERPRETER_SYSTEM_PROMPT = SYSTEM_PROMPT.full
+print(f"System prompt: {len(SYSTEM_PROMPT.full)} chars, {SYSTEM_PROMPT.full_tokens} tokens")
+
+# 질문과 관련된 메서드 문서만 보내는 모드 (토큰은 줄지만 프롬프트 캐시 적중은 줄어듦)
+SYSTEM_PROMPT_RETRIEVAL = config("SYSTEM_PROMPT_RETRIEVAL", default=False, cast=bool)
+
+# 대화 기록의 프롬프트 토큰 예산 (gpt-4 8k 컨텍스트에서 답변 몫을 남김)과 실행 결과 최대 길이
+DIALOG_TOKEN_BUDGET = config("DIALOG_TOKEN_BUDGET", default=7000, cast=int)
+AGENT_TOKEN_BUDGET = config("AGENT_TOKEN_BUDGET", default=2000, cast=int)
+EXECUTION_OUTPUT_MAX_CHARS = config("EXECUTION_OUTPUT_MAX_CHARS", default=1000, cast=int)
+
+# 전체 시스템 프롬프트 옆에 잘린 실행 결과 하나 (한글은 글자당 약 1토큰)가 들어가야 함
+if estimate_tokens(CODE_INTERPRETER_SYSTEM_PROMPT) + EXECUTION_OUTPUT_MAX_CHARS > DIALOG_TOKEN_BUDGET:
+    print(
+        f"DIALOG_TOKEN_BUDGET={DIALOG_TOKEN_BUDGET} cannot fit the system prompt and one execution output "
+        f"of EXECUTION_OUTPUT_MAX_CHARS={EXECUTION_OUTPUT_MAX_CHARS}; history will exceed the budget"
+    )
 
 IMAGE_DESCRIPTOR_SYSTEM_PROMPT = "너는 그래프 이미지에서 확인할 수 있는 정보를 찾아내는 역할을 할거야. 그래프 이미지를 생성하기 위한 파이썬 코드를 참고하여 그래프 이미지에서 확인할 수 있는 정보에 대해 설명해줘. 답변을 생성할 때는 반드시 한국어로 답변해."
 
 EXTRACT_KEYWORD_SYSTEM_PROMPT = "너는 텍스트에서 하나의 키워드를 추출하는 역할을 할거야. 이 키워드는 구글에서 뉴스를 검색하는 용도로 사용할거야. 예를 들어서 [삼성전자 종가 기준 10년 그래프를 그려줘] 라는 사용자 입력이 있을 때, 여기서 '삼성전자'를 추출해줘야 해. 즉, 기업명을 추출해줘. 또 다른 예시로는 [KOSPI 200 지수 10년 그래프를 그려줘] 라는 사용자 입력이 있을 때, 여기서는 'KOSPI 200'을 추출해줘야 해."
 
-
-def distinguish_and_handle(input_str):
-    if hasattr(input_str, "content"):
-        input_str = input_str.content
-
-    base64_pattern = r"^(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$"
-
-    if encoded_bytes_group := re.match(base64_pattern, input_str):
-        try:
-            encoded_bytes = encoded_bytes_group.group(0)
-            decoded_bytes = base64.b64decode(encoded_bytes)
-            img = Image.open(BytesIO(decoded_bytes))
-            return encoded_bytes, img
-        except Exception:
-            return input_str, None
-    return input_str, None
+# 검색 키워드 추출: 로컬 종목 별칭 인덱스 -> LRU 캐시 -> LLM 순서로 시도
+KEYWORD_EXTRACTOR = KeywordExtractor(
+    load_alias_index(
+        config("KEYWORD_ALIAS_FILE", default="./stock_aliases.csv"),
+        config("KEYWORD_LISTING_FILE", default=""),
+    ),
+    cache_size=config("KEYWORD_CACHE_SIZE", default=1024, cast=int),
+)
+
+SERPER_URL = config("SERPER_URL", default="https://google.serper.dev/news")
+EXECUTOR_URL = config("EXECUTOR_URL", default="http://localhost:8081/execute")
+
+# 외부 API별 타임아웃 (초)
+OPENAI_TIMEOUT = config("OPENAI_TIMEOUT", default=120, cast=float)
+SERPER_TIMEOUT = config("SERPER_TIMEOUT", default=10, cast=float)
+EXECUTOR_TIMEOUT = config("EXECUTOR_TIMEOUT", default=300, cast=float)
+
+# 워커 프로세스당 외부 API별 동시 요청 수 제한
+OPENAI_LIMIT = asyncio.Semaphore(config("OPENAI_CONCURRENCY", default=32, cast=int))
+SERPER_LIMIT = asyncio.Semaphore(config("SERPER_CONCURRENCY", default=16, cast=int))
+EXECUTOR_LIMIT = asyncio.Semaphore(config("EXECUTOR_CONCURRENCY", default=8, cast=int))
+
+# Serper, code_exec 호출에 공유하는 비동기 HTTP 클라이언트
+HTTP_CLIENT = httpx.AsyncClient()
+
+# OpenAI 연결 풀 설정 (앱 전체에서 클라이언트 하나를 공유)
+OPENAI_HTTP2 = config("OPENAI_HTTP2", default=True, cast=bool)
+OPENAI_MAX_CONNECTIONS = config("OPENAI_MAX_CONNECTIONS", default=100, cast=int)
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config("OPENAI_MAX_KEEPALIVE_CONNECTIONS", default=20, cast=int)
+OPENAI_KEEPALIVE_EXPIRY = config("OPENAI_KEEPALIVE_EXPIRY", default=120.0, cast=float)
+
+
+def create_openai_client() -> AsyncOpenAI:
+    """Application-scoped OpenAI client over one HTTP/2 keep-alive connection pool.
+
+    Create it once at startup and pass it to the generators. With HTTP/2,
+    concurrent requests are multiplexed over a few long-lived connections, so
+    TLS handshakes only happen when the pool grows or a connection expires.
+    """
+    http_client = httpx.AsyncClient(
+        http2=OPENAI_HTTP2,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=OPENAI_TIMEOUT,
+    )
+    return AsyncOpenAI(api_key=config("OPENAI_API_KEY"), http_client=http_client, timeout=OPENAI_TIMEOUT)
 
 
-def get_financial_news(search_keyword: str):
+async def get_financial_news(search_keyword: str):
     SERPER_API_KEY = config("SERPER_API_KEY")
-    SERPER_URL = "https://google.serper.dev/news"
 
     payload = json.dumps(
         {
@@ -71,221 +131,365 @@ def get_financial_news(search_keyword: str):
         "Content-Type": "application/json",
     }
 
-    response = requests.request("POST", SERPER_URL, headers=headers, data=payload)
+    async with SERPER_LIMIT:
+        response = await HTTP_CLIENT.post(
+            SERPER_URL, headers=headers, content=payload, timeout=SERPER_TIMEOUT
+        )
+
+    # 4xx/5xx (키 오류, 한도 초과 등)는 httpx.HTTPStatusError로 올려 search_news에서 빈 결과로 처리
+    response.raise_for_status()
 
     # json 형태로 변환
     return json.loads(response.text)
 
 
+class StageTimer:
+    """Wall-clock seconds per pipeline stage, accumulated across retries.
+
+    Stages overlap (news branch, image description), so each one records its
+    own elapsed time; ``total`` is the end-to-end time.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
+
+    def add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self) -> dict[str, float]:
+        self.timings["total"] = time.perf_counter() - self.start_time
+        return {name: round(seconds, 3) for name, seconds in self.timings.items()}
+
+
+async def search_news(user_message: str, extract_keyword, timer: StageTimer):
+    """Keyword -> news branch of the chat pipeline, independent of code generation.
+
+    News is supplementary, so a Serper failure or timeout yields an empty
+    result instead of failing the whole chat.
+    """
+    with timer.stage("news_branch"):
+        with timer.stage("keyword"):
+            search_keyword = await extract_keyword(user_message)
+        print(" === search_keyword : ", search_keyword)
+
+        with timer.stage("news"):
+            try:
+                news_result = await get_financial_news(search_keyword)
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"An error occurred: {e}")
+                news_result = {}
+        print(" === news_result : ", news_result)
+
+    return news_result
+
+
 class GPTAgent:
-    def __init__(self, system_message, model="gpt-4"):
-        self.client = OpenAI(api_key=config("OPENAI_API_KEY"))
+    def __init__(self, system_message, client: AsyncOpenAI, model="gpt-4"):
+        self.client = client
         self.model = model
         self.system_message = system_message
-        self.chat_history = deque([])
+        self.chat_history = DialogHistory(system_message, AGENT_TOKEN_BUDGET, EXECUTION_OUTPUT_MAX_CHARS)
 
-    def chat(self, user_input):
-        messages = [{"role": "system", "content": self.system_message}]
-        for chat in self.chat_history:
-            messages.append(chat)
+    async def chat(self, user_input):
+        self.chat_history.append("user", user_input)
 
-        messages.append({"role": "user", "content": user_input})
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=0.2,
-        )
+        async with OPENAI_LIMIT:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self.chat_history.messages(),
+                temperature=0.2,
+            )
 
         assistant_message = response.choices[0].message.content
 
-        self.chat_history.append({"role": "user", "content": user_input})
-        self.chat_history.append({"role": "assistant", "content": assistant_message})
+        self.chat_history.append("assistant", assistant_message)
 
         return assistant_message
 
 
 class GPTNewsGenerator:
-    def __init__(self, model="gpt-4"):
+    def __init__(self, client: AsyncOpenAI, model="gpt-4"):
         self.model = model
         self.dialog = [{"role": "system", "content": EXTRACT_KEYWORD_SYSTEM_PROMPT}]
-        self.client = OpenAI(api_key=config("OPENAI_API_KEY"))
+        self.client = client
 
         # 요약 키워드(검색어) 추출
 
-    def extract_keyword(self, user_input: str):
-        agent = GPTAgent(system_message=EXTRACT_KEYWORD_SYSTEM_PROMPT)
-        keyword = agent.chat(f"[{user_input}]에서 키워드를 추출해주세요.")
+    async def extract_keyword(self, user_input: str):
+        return await KEYWORD_EXTRACTOR.extract(user_input, self.extract_keyword_with_llm)
+
+    async def extract_keyword_with_llm(self, user_input: str):
+        agent = GPTAgent(system_message=EXTRACT_KEYWORD_SYSTEM_PROMPT, client=self.client)
+        keyword = await agent.chat(f"[{user_input}]에서 키워드를 추출해주세요.")
         return keyword
 
-    def chat(self, user_message: str):
+    async def chat(self, user_message: str):
         print(colored(user_message, "blue"))
         self.dialog.append({"role": "user", "content": user_message})
-        total_start_time = time.time()
-        search_keyword = ""
-        search_keyword = self.extract_keyword(user_message)
-
-        print(" === search_keyword : ", search_keyword)
-        news_result = get_financial_news(search_keyword)
-        print(" === news_result : ", news_result)
-        print(f"=== Total Execution Time: {time.time() - total_start_time} ===")
+        timer = StageTimer()
+        news_result = await search_news(user_message, self.extract_keyword, timer)
+        timings = timer.finish()
+        print(f"=== Total Execution Time: {timings['total']} ===")
         code_exec_result = CodeExecResult(text="", image="")
 
         return ChatResponse(
             generated_code="",
             code_exec_result=code_exec_result,
             news_result=news_result,
+            timings=timings,
         )
 
 
 class GPTCodeGenerator:
-    def __init__(self, model="gpt-4"):
+    def __init__(self, client: AsyncOpenAI, model="gpt-4"):
         self.model = model
-        self.dialog = [{"role": "system", "content": CODE_INTERPRETER_SYSTEM_PROMPT}]
-        self.messages = [{"role": "system", "content": IMAGE_DESCRIPTOR_SYSTEM_PROMPT}]
+        self.dialog = DialogHistory(CODE_INTERPRETER_SYSTEM_PROMPT, DIALOG_TOKEN_BUDGET, EXECUTION_OUTPUT_MAX_CHARS)
         self.messages_2 = [{"role": "system", "content": EXTRACT_KEYWORD_SYSTEM_PROMPT}]
-        self.client = OpenAI(api_key=config("OPENAI_API_KEY"))
-
-    def chat_completion(self):
-        dialog_stream = self.client.chat.completions.create(
-            model=self.model,
-            messages=self.dialog,
-            temperature=0,
-            stream=True,
-        )
-
-        buffer = ""
-        stop_condition_met = [False, False]
-
-        for chunk in dialog_stream:
-            content = chunk.choices[0].delta.content
-            if content:
-                buffer += content
-
-                if "```python" in buffer:
-                    stop_condition_met[0] = True
-                elif stop_condition_met[0] and "```" in buffer:
-                    break
-        return buffer
+        self.client = client
+        self.on_event = None
+        self.usage = {}
+
+    def add_usage(self, name: str, tokens):
+        # 토크나이저를 쓸 수 없으면 tokens가 None
+        if tokens is not None:
+            self.usage[name] = self.usage.get(name, 0) + tokens
+
+    def emit(self, event_type: str, **data):
+        # 스트리밍 응답일 때만 중간 결과를 이벤트로 전달
+        if self.on_event is not None:
+            self.on_event(event_type, data)
+
+    async def chat_completion(self):
+        """Stream a reply; returns ``(generated_text, code_block)``.
+
+        The stream is cut as soon as the first Python block is closed, so the
+        model stops spending tokens on text nobody reads. ``code_block`` is
+        None when the reply has no complete Python block.
+        """
+        parser = CodeFenceParser()
+        # 코드 블록이 닫히면 스트림을 끊어 usage를 받지 못하므로 직접 계산
+        self.add_usage("codegen_prompt_tokens", count_message_tokens(self.dialog.messages()))
+
+        async with OPENAI_LIMIT:
+            dialog_stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self.dialog.messages(),
+                temperature=0,
+                stream=True,
+            )
+
+            # 중간에 break 해도 업스트림 연결을 닫음
+            async with dialog_stream:
+                async for chunk in dialog_stream:
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        self.emit("token", text=content)
+                        # 코드 블록이 닫히는 즉시 생성 중단
+                        if parser.feed(content) is not None:
+                            break
+        return parser.text, parser.code
 
     # 이미지(차트)에 대한 설명
-    def descript_image(self, code_block: str, image_result: str):
+    async def descript_image(self, code_block: str, image_result: str):
+        # 이미지 디코딩/리사이즈는 CPU 작업이므로 이벤트 루프 밖에서 처리
+        image_url = await asyncio.to_thread(to_vision_data_url, image_result)
         query_content = [
             {"type": "text", "text": code_block},
             {
                 "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{image_result}"},
+                "image_url": {"url": image_url},
             },
         ]
-        self.messages.append({"role": "user", "content": query_content})
+        # 요청마다 별도의 메시지 목록 사용 (이전 이미지가 함께 전송되지 않도록)
+        messages = [
+            {"role": "system", "content": IMAGE_DESCRIPTOR_SYSTEM_PROMPT},
+            {"role": "user", "content": query_content},
+        ]
 
         execution_start_time = time.time()
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=self.messages,
-            temperature=0.2,
-        )
+        async with OPENAI_LIMIT:
+            response = await self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                temperature=0.2,
+            )
 
         execution_duration = time.time() - execution_start_time
         print(
             f"Generate image description successfully in {execution_duration}seconds."
         )
+        if response.usage:
+            self.add_usage("describe_prompt_tokens", response.usage.prompt_tokens)
 
         return response.choices[0].message.content
 
     # 요약 키워드(검색어) 추출
-    def extract_keyword(self, user_input: str):
+    async def extract_keyword(self, user_input: str):
+        return await KEYWORD_EXTRACTOR.extract(user_input, self.extract_keyword_with_llm)
 
-        agent = GPTAgent(system_message=EXTRACT_KEYWORD_SYSTEM_PROMPT)
-        keyword = agent.chat(f"[{user_input}]에서 키워드를 추출해주세요.")
+    async def extract_keyword_with_llm(self, user_input: str):
+        agent = GPTAgent(system_message=EXTRACT_KEYWORD_SYSTEM_PROMPT, client=self.client)
+        keyword = await agent.chat(f"[{user_input}]에서 키워드를 추출해주세요.")
 
         return keyword
 
     @staticmethod
-    def execute_code(code: str) -> str:
-        # code_exec API의 endpoint
-        url = os.getenv("EXECUTOR_URL", "http://localhost:8081/execute")
-
-        response = requests.post(url, json={"code": code})
-        result = response.json().get("result", "")
-        return distinguish_and_handle(result)
+    async def execute_code(code: str, on_image=None):
+        """Run ``code`` on code_exec, reading its typed NDJSON event stream.
+
+        Returns an ``ExecutionOutput`` whose ``image`` is the base64 PNG of the
+        last image part, or None. ``on_image(image)`` is called as soon as each
+        image arrives, and a traceback ends the read right away instead of
+        waiting for the run.
+        """
+        async with EXECUTOR_LIMIT:
+            async with HTTP_CLIENT.stream(
+                "POST",
+                EXECUTOR_URL,
+                json={"code": code, "stream": True},
+                timeout=EXECUTOR_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                return await aparse_execution_events(response.aiter_lines(), on_image=on_image)
+
+    async def chat(self, user_message: str, max_try: int = 1, on_event=None):
+        """Answer ``user_message`` with generated code, its result and related news.
+
+        The keyword -> news branch runs concurrently with the
+        codegen -> execute -> describe branch, so end-to-end latency is the
+        longer of the two instead of their sum. Per-stage seconds are returned
+        in ``ChatResponse.timings``.
+
+        ``on_event(event_type, data)`` receives partial results as they are
+        produced: ``token`` for each generated chunk, then ``code``,
+        ``image``, ``execution`` or ``description``, and ``news``.
+        """
+        print(colored(user_message, "blue"))
+        self.dialog.append("user", user_message, pin=True)
+        self.on_event = on_event
+
+        if SYSTEM_PROMPT_RETRIEVAL:
+            system_prompt = SYSTEM_PROMPT.for_question(user_message)
+            self.dialog.set_system(system_prompt)
+            self.add_usage("system_prompt_tokens", count_tokens(system_prompt))
+        else:
+            self.add_usage("system_prompt_tokens", SYSTEM_PROMPT.full_tokens)
+
+        async def news_branch():
+            news_result = await search_news(user_message, self.extract_keyword, timer)
+            self.emit("news", news_result=news_result)
+            return news_result
+
+        timer = StageTimer()
+        news_result, (code_block, code_exec_result) = await asyncio.gather(
+            news_branch(),
+            self.generate_and_execute(max_try, timer),
+        )
 
-    @staticmethod
-    def extract_code_blocks(text: str):
-        pattern = r"```(?:python\n)?(.*?)```"
-        code_blocks = re.findall(pattern, text, re.DOTALL)
-        return [block.strip() for block in code_blocks]
+        print(f"=== text_result : {code_exec_result.text} ===")
 
-    def chat(self, user_message: str, max_try: int = 1):
-        print(colored(user_message, "blue"))
-        self.dialog.append({"role": "user", "content": user_message})
+        timings = timer.finish()
+        print(f"=== Stage Timings: {timings} ===")
+        print(f"=== Prompt Tokens: {self.usage} ===")
+        print(f"=== Dialog History: {self.dialog.stats()} ===")
 
-        total_start_time = time.time()
+        return ChatResponse(
+            generated_code=code_block,
+            code_exec_result=code_exec_result,
+            news_result=news_result,
+            timings=timings,
+            usage={**self.usage, **self.dialog.stats()},
+            turn_tokens=self.dialog.turn_tokens(),
+        )
 
+    async def generate_and_execute(self, max_try: int, timer: StageTimer):
+        """Codegen -> execute -> describe branch; returns ``(code_block, CodeExecResult)``."""
         image_result = None
         text_result = None
+        failed = realtime = False
         code_block = ""
-        search_keyword = ""
-
-        search_keyword = self.extract_keyword(user_message)
-
-        print(" === search_keyword : ", search_keyword)
-
-        news_result = get_financial_news(search_keyword)
-
-        print(" === news_result : ", news_result)
 
-        for i in range(max_try):
-            generated_text = self.chat_completion()
-            print(generated_text)
-            print(f"==== {i}번째 generated text : {generated_text}=== \n")
+        with timer.stage("code_branch"):
+            for i in range(max_try):
+                with timer.stage("codegen"):
+                    generated_text, generated_code = await self.chat_completion()
+                print(f"==== {i}번째 generated text : {generated_text}=== \n")
 
-            if "<done>" in generated_text:
-                generated_text = generated_text.split("<done>")[0].strip()
-                self.dialog.append({"role": "assistant", "content": generated_text})
-                break
-
-            if code_blocks := self.extract_code_blocks(generated_text):
-                code_block = code_blocks[-1]
-                code_output, img_raw = self.execute_code(code_block)
+                if "<done>" in generated_text:
+                    generated_text = generated_text.split("<done>")[0].strip()
+                    self.dialog.append("assistant", generated_text)
+                    break
 
-                if img_raw:
-                    image_result = code_output
-                    code_output = "image"  # TODO
-                    text_result = self.descript_image(code_block, image_result)
+                if generated_code:
+                    code_block = generated_code
+                    self.emit("code", code=code_block)
+
+                    # 이미지가 나오는 즉시 설명 생성을 시작 (실행 종료와 병렬)
+                    # 새 이미지가 오면 이전 이미지의 설명은 쓰이지 않으므로 취소
+                    pending = {}
+
+                    async def describe(code_block, image):
+                        with timer.stage("describe"):
+                            return await self.descript_image(code_block, image)
+
+                    def on_image(image, code_block=code_block):
+                        self.emit("image", image=image)
+                        if (previous := pending.pop("task", None)) is not None:
+                            previous.cancel()
+                        pending["image"] = image
+                        pending["task"] = asyncio.create_task(describe(code_block, image))
+
+                    try:
+                        with timer.stage("execute"):
+                            code_output, image, failed, realtime = await self.execute_code(code_block, on_image)
+
+                        if image:
+                            image_result = image
+                            code_output = "image"  # TODO
+                            # 실행 이후 설명을 기다린 시간 (설명 생성 중 실행과 겹치지 않은 부분)
+                            with timer.stage("describe_wait"):
+                                if pending.get("image") == image_result:
+                                    text_result = await pending.pop("task")
+                                else:
+                                    self.emit("image", image=image_result)
+                                    text_result = await describe(code_block, image_result)
+                            self.emit("description", text=text_result)
+                        else:
+                            text_result = code_output
+                            self.emit("execution", text=text_result)
+                    finally:
+                        # 실행 실패/취소 또는 최종 이미지가 아닌 경우 남은 설명 요청 취소
+                        if (task := pending.pop("task", None)) is not None:
+                            task.cancel()
+
+                    # 긴 실행 결과는 앞/뒤만 남기고, 예산을 넘으면 오래된 결과부터 생략
+                    self.dialog.append_execution(generated_text, code_output)
+
+                    feedback_content = (
+                        "Keep going. If you think debugging, tell me where you got wrong and suggest better code. "
+                        "Need conclusion to question only in text (Do not leave result part alone). "
+                        "If no further generation is needed, just say <done>."
+                    )
+                    self.dialog.append("user", feedback_content)
                 else:
-                    text_result = code_output
-
-                response_content = (
-                    f"{generated_text}\n```Execution Result:\n{code_output}\n```"
-                )
-                self.dialog.append({"role": "assistant", "content": response_content})
-
-                feedback_content = (
-                    "Keep going. If you think debugging, tell me where you got wrong and suggest better code. "
-                    "Need conclusion to question only in text (Do not leave result part alone). "
-                    "If no further generation is needed, just say <done>."
-                )
-                self.dialog.append({"role": "user", "content": feedback_content})
-            else:
-                self.dialog.append({"role": "assistant", "content": generated_text})
-                break
-
-        print(f"=== text_result : {text_result} ===")
-        code_exec_result = CodeExecResult(text=text_result, image=image_result)
-
-        print(f"=== Total Execution Time: {time.time() - total_start_time} ===")
+                    self.dialog.append("assistant", generated_text)
+                    break
 
-        return ChatResponse(
-            generated_code=code_block,
-            code_exec_result=code_exec_result,
-            news_result=news_result,
-        )
+        return code_block, CodeExecResult(text=text_result, image=image_result, error=failed, realtime=realtime)
 
 
 if __name__ == "__main__":
-    gpt_generator = GPTCodeGenerator()
-    gpt_news_generator = GPTNewsGenerator()
-    for char in gpt_generator.chat("what is 10th fibonacci number?"):
-        print(char, end="")
+    openai_client = create_openai_client()
+    gpt_generator = GPTCodeGenerator(openai_client)
+    gpt_news_generator = GPTNewsGenerator(openai_client)
+    print(asyncio.run(gpt_generator.chat("what is 10th fibonacci number?")))
@@ -0,0 +1,152 @@
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    message = re.sub(r"[^\w\s]", " ", message.lower())
+    return re.sub(r"\s+", " ", message).strip()
+
+
+def char_ngrams(message: str, n: int = 2) -> Counter:
+    """Per-word character n-gram counts, a cheap local embedding that ignores word order."""
+    ngrams = Counter()
+    for word in message.split():
+        if len(word) < n:
+            ngrams[word] += 1
+        else:
+            ngrams.update(word[i : i + n] for i in range(len(word) - n + 1))
+    return ngrams
+
+
+def cosine(a: Counter, b: Counter, norm_a: float, norm_b: float) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[gram] for gram, count in a.items())
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+class ResponseCache:
+    """LRU cache of ``ChatResponse`` objects keyed by the normalized user message.
+
+    Answers whose code read real-time data (code_exec's ``realtime`` flag,
+    set from its own marker list) expire after ``realtime_ttl``, others after
+    ``ttl``. Failed executions are never stored. Size is bounded by the
+    serialized bytes of the cached responses, since chart images dominate
+    memory.
+
+    With ``similarity`` set, a miss on the exact key falls back to the most
+    similar cached message by char-bigram cosine. Candidates must mention
+    the same company (``entity_of``) and the same numbers, so "삼성전자 10년"
+    never answers "SK하이닉스 10년" or "삼성전자 5년".
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        max_entry_bytes: int,
+        ttl: float,
+        realtime_ttl: float,
+        similarity: float = 0.0,
+        entity_of=None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.realtime_ttl = realtime_ttl
+        self.similarity = similarity
+        self.entity_of = entity_of
+        self._entries = OrderedDict()  # key -> (expires_at, response, size, signature, ngrams, norm)
+        self._bytes = 0
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def signature(self, key: str):
+        entity = self.entity_of(key) if self.entity_of else None
+        return entity, tuple(re.findall(r"\d+", key))
+
+    def _find_similar(self, key: str):
+        signature = self.signature(key)
+        if signature[0] is None:
+            return None
+
+        ngrams = char_ngrams(key)
+        norm = math.sqrt(sum(count * count for count in ngrams.values()))
+        now = time.monotonic()
+        best_key, best_score = None, self.similarity
+        for entry_key, (expires_at, _, _, entry_signature, entry_ngrams, entry_norm) in self._entries.items():
+            # 만료된 항목은 후보에서 제외 (더 나은 유효 후보를 가리지 않도록)
+            if expires_at <= now or entry_signature != signature:
+                continue
+            if (score := cosine(ngrams, entry_ngrams, norm, entry_norm)) >= best_score:
+                best_key, best_score = entry_key, score
+        return best_key
+
+    def get(self, message: str):
+        """Cached response for ``message``, or None on a miss."""
+        key = normalize_message(message)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        semantic = False
+        if entry is None and self.similarity > 0:
+            if (similar_key := self._find_similar(key)) is not None:
+                key, entry, semantic = similar_key, self._entries[similar_key], True
+
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.semantic_hits += semantic
+        return entry[1]
+
+    def put(self, message: str, response):
+        # 실행 결과가 없거나 실행이 실패한 답변 (traceback)은 저장하지 않음
+        result = response.code_exec_result
+        if result.error or (not result.text and not result.image):
+            return
+
+        size = len(response.model_dump_json())
+        if size > self.max_entry_bytes:
+            return
+
+        ttl = self.realtime_ttl if result.realtime else self.ttl
+
+        key = normalize_message(message)
+        ngrams = char_ngrams(key)
+        norm = math.sqrt(sum(count * count for count in ngrams.values()))
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, response, size, self.signature(key), ngrams, norm)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        size = self._entries.pop(key)[2]
+        self._bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,221 @@
+"""Code interpreter system prompt generated from the LSFetcher source.
+
+The method section is rendered from the signatures and docstrings of the
+public ``get_*`` methods of ``LSFetcher`` (parsed with ``ast``, so nothing
+from code_exec is imported), in source order. The full prompt is built once
+at startup and is identical for every request, so the provider's prompt
+cache can reuse it as a prefix.
+
+Regenerate the committed fallback after changing LSFetcher docstrings:
+    python system_prompt.py > code_interpreter_system_prompt.txt
+"""
+import argparse
+import ast
+import copy
+import os
+import sys
+from typing import NamedTuple
+
+PROMPT_HEADER = """You are code-interpreter GPT that can execute code by generation of code in ```python\\n(here)```.
+You must use the methods below or yfinance library whenever you need real-time stock data.
+Since these methods belong to the LSFetcher class in the LSFetcher module, be sure to import the LSFetcher class from the LSFetcher module when using them.
+When you need the current date, make sure to use the datetime module.
+When drawing graphs, make sure to write everything in English, not in Korean.
+Create the fetcher with LSFetcher(typed=True) when you want to analyze or plot list results: the investor sale trend, ETF composition and increase/decrease rate methods then return pandas DataFrames with numeric columns (indexed by date for sale trends), so no manual float conversion is needed."""
+
+METHOD_EXAMPLES = {
+    "get_etf_composition": '''This is the example how to use get_etf_composition() function.
+```python
+import matplotlib.pyplot as plt
+from LSFetcher import LSFetcher
+
+def fetch_etf_composition(shcode: str, date: str, sgb: str):
+    fetcher = LSFetcher()
+    etf_composition = fetcher.get_etf_composition(shcode, date, sgb)
+    return etf_composition
+
+def main():
+    shcode = '069500'  # KOSPI 200 ETF's stock code
+    date = '20240102'  # Date: January 2, 2024
+    sgb = '1'  # Specific classification for the ETF composition data
+    data = fetch_etf_composition(shcode, date, sgb)
+
+    # Convert the weight data to float for plotting
+    for item in data:
+        item['weight'] = float(item['weight'])
+
+    # Create a pie chart
+    labels = [item['hname'] for item in data]
+    sizes = [item['weight'] for item in data]
+    plt.pie(sizes, labels=labels, autopct='%1.1f%%')
+    plt.title('KOSPI 200 ETF Composition on January 2, 2024')
+    plt.show()
+
+main()
+```''',
+}
+
+# 검색 모드: 질문에 아래 단어가 있으면 메서드 이름에 해당 부분이 들어간 문서를 포함
+RETRIEVAL_KEYWORDS = {
+    "get_today_": (
+        "오늘", "현재", "지금", "실시간", "시가", "고가", "저가", "거래량", "주가수익비율", "시가총액", "시총", "등락", "today", "current", "price",
+    ),
+    "get_stock_chart_": (
+        "차트", "그래프", "종가", "추이", "일봉", "분봉", "주가", "개월", "이동평균", "chart", "graph", "close",
+    ),
+    "investor_sale_trend": ("개인", "외국인", "기관", "투자자", "순매수", "매매동향", "수급", "investor"),
+    "get_etf_composition": ("etf", "구성", "비중", "편입"),
+    "rate_item": ("상승률", "하락률", "급등", "급락", "상위", "하위", "top"),
+}
+
+_encoding = None
+
+
+class MethodDoc(NamedTuple):
+    name: str
+    text: str
+
+
+def module_constants(tree: ast.Module) -> dict:
+    """Literal values of module-level constants, including the defaults of ``config(...)`` settings."""
+    constants = {}
+    for node in tree.body:
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+            continue
+        value = node.value
+        if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == "config":
+            value = next((keyword.value for keyword in value.keywords if keyword.arg == "default"), None)
+        if isinstance(value, ast.Constant):
+            constants[node.targets[0].id] = value
+    return constants
+
+
+def resolve_default(default, constants: dict):
+    # 모델은 모듈 상수를 알 수 없으므로 리터럴 값으로 표시 (알 수 없으면 ...)
+    if isinstance(default, ast.Name):
+        return constants.get(default.id, ast.Constant(value=...))
+    return default
+
+
+def render_method(node: ast.FunctionDef, constants: dict = None) -> str:
+    args = copy.deepcopy(node.args)
+    args.defaults = [resolve_default(default, constants or {}) for default in args.defaults]
+    args.kw_defaults = [resolve_default(default, constants or {}) for default in args.kw_defaults]
+
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    # 들여쓰기는 토큰만 늘리므로 docstring은 들여쓰지 않음
+    text = f'def {node.name}({ast.unparse(args)}){returns}:\n"""\n{ast.get_docstring(node)}\n"""'
+    if example := METHOD_EXAMPLES.get(node.name):
+        text = f"{text}\n\n{example}"
+    return text
+
+
+def load_method_docs(source_path: str) -> list[MethodDoc]:
+    """Documented public ``get_*`` methods of ``LSFetcher`` in source order."""
+    with open(source_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    constants = module_constants(tree)
+    fetcher = next(
+        node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == "LSFetcher"
+    )
+    return [
+        MethodDoc(node.name, render_method(node, constants))
+        for node in fetcher.body
+        if isinstance(node, ast.FunctionDef)
+        and node.name.startswith("get_")
+        and "Returns:" in (ast.get_docstring(node) or "")
+    ]
+
+
+def get_encoding():
+    """cl100k_base tokenizer, or None when tiktoken or its BPE file is unavailable.
+
+    tiktoken downloads the BPE file on first use, so this is called once at
+    startup rather than on the request path.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"Token counting disabled: {type(e).__name__}", file=sys.stderr)
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str):
+    encoding = get_encoding()
+    return len(encoding.encode(text)) if encoding else None
+
+
+def count_message_tokens(messages):
+    """Prompt tokens of a chat request including per-message overhead, or None without a tokenizer."""
+    if (encoding := get_encoding()) is None:
+        return None
+
+    tokens = 3  # 답변 시작 토큰
+    for message in messages:
+        tokens += 3
+        content = message["content"]
+        if isinstance(content, str):
+            tokens += len(encoding.encode(content))
+        else:
+            tokens += sum(len(encoding.encode(part["text"])) for part in content if part["type"] == "text")
+    return tokens
+
+
+class SystemPrompt:
+    """Static header followed by method docs; ``full`` is built once and never varies.
+
+    ``for_question`` keeps only the docs whose retrieval keywords appear in the
+    question, in the same source order, so questions that select the same
+    methods still share a prefix. It falls back to ``full`` when nothing
+    matches or when no method docs are available.
+    """
+
+    def __init__(self, header: str, docs: list[MethodDoc]):
+        self.header = header
+        self.docs = docs
+        self.full = self.render(docs) if docs else header
+        self.full_tokens = count_tokens(self.full)
+
+    def render(self, docs: list[MethodDoc]) -> str:
+        return "\n\n\n".join([self.header, *(doc.text for doc in docs)]) + "\n"
+
+    def for_question(self, question: str) -> str:
+        question = question.lower()
+        matched = [
+            part for part, keywords in RETRIEVAL_KEYWORDS.items() if any(keyword in question for keyword in keywords)
+        ]
+        docs = [doc for doc in self.docs if any(part in doc.name for part in matched)]
+        return self.render(docs) if docs else self.full
+
+
+def load_system_prompt(source_path: str, fallback_path: str) -> SystemPrompt:
+    """Generate the prompt from ``source_path``, or use the committed prompt file if it is missing."""
+    if os.path.isfile(source_path):
+        return SystemPrompt(PROMPT_HEADER, load_method_docs(source_path))
+
+    print(f"LSFetcher source not found: {source_path}, using {fallback_path}")
+    with open(fallback_path, "r", encoding="utf-8") as f:
+        return SystemPrompt(f.read(), [])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default="../code_exec/fetch/LSFetcher.py")
+    parser.add_argument("--question", help="show the retrieval-mode prompt size for this question")
+    args = parser.parse_args()
+
+    system_prompt = SystemPrompt(PROMPT_HEADER, load_method_docs(args.source))
+    if args.question:
+        prompt = system_prompt.for_question(args.question)
+        print(
+            f"full: {len(system_prompt.full)} chars / {system_prompt.full_tokens} tokens, "
+            f"retrieval: {len(prompt)} chars / {count_tokens(prompt)} tokens"
+        )
+    else:
+        print(system_prompt.full, end="")
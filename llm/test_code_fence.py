@@ -0,0 +1,61 @@
+import pytest
+
+from code_fence import DONE, CodeFenceParser
+
+RESPONSE = (
+    "이전 결과입니다.\n"
+    "```Execution Result\n[1, 2, 3]\n```\n"
+    "코드를 실행하겠습니다.\n"
+    "```python\nprint(sum([1, 2, 3]))\n```\n"
+    "끝."
+)
+
+
+def feed_all(chunks):
+    parser = CodeFenceParser()
+    results = [parser.feed(chunk) for chunk in chunks]
+    return parser, [result for result in results if result is not None]
+
+
+def test_whole_response():
+    parser, results = feed_all([RESPONSE])
+    assert results == ["print(sum([1, 2, 3]))"]
+    assert parser.state == DONE
+    assert parser.text == RESPONSE
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7])
+def test_fences_split_across_chunks(size):
+    chunks = [RESPONSE[i : i + size] for i in range(0, len(RESPONSE), size)]
+    parser, results = feed_all(chunks)
+    assert results == ["print(sum([1, 2, 3]))"]
+    assert parser.text == RESPONSE
+
+
+def test_code_is_returned_at_the_closing_fence():
+    parser = CodeFenceParser()
+    assert parser.feed("```python\nx = 1\n") is None
+    assert parser.feed("``") is None
+    assert parser.feed("`\n설명") == "x = 1"
+    assert parser.feed("```python\ny = 2\n```") is None
+    assert parser.code == "x = 1"
+
+
+@pytest.mark.parametrize("fence", ["```", "```py", "``` Python "])
+def test_code_languages(fence):
+    _, results = feed_all([f"{fence}\nx = 1\n```"])
+    assert results == ["x = 1"]
+
+
+def test_unclosed_or_missing_block():
+    assert feed_all(["설명만 있는 답변"])[1] == []
+    parser, results = feed_all(["```python\nx = 1\n"])
+    assert results == [] and parser.code is None
+
+
+def test_carry_over_is_bounded():
+    # 청크마다 최대 두 개의 백틱만 다음 청크로 넘김
+    parser = CodeFenceParser()
+    for _ in range(1000):
+        parser.feed("가나다 `` ")
+        assert len(parser._pending) <= 2
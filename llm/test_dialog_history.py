@@ -0,0 +1,91 @@
+import pytest
+
+import dialog_history
+from dialog_history import DialogHistory, truncate_output
+
+SYSTEM_PROMPT = "a" * 13740  # 토크나이저 없이 약 4580 토큰 (전체 시스템 프롬프트 크기)
+FEEDBACK = "Keep going. If you think debugging, tell me where you got wrong and suggest better code."
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    # 토크나이저 유무와 관계없이 같은 추정치로 계산
+    monkeypatch.setattr(dialog_history, "count_tokens", lambda text: None)
+
+
+def roles(history):
+    return [message["role"] for message in history.messages()]
+
+
+def test_truncate_output_keeps_head_and_tail():
+    output = "H" * 600 + "M" * 1000 + "T" * 600
+    truncated = truncate_output(output, 1000)
+
+    assert truncated.startswith("H" * 500)
+    assert truncated.endswith("T" * 500)
+    assert "[1200 chars truncated]" in truncated
+    assert truncate_output("short", 1000) == "short"
+
+
+def test_latest_execution_is_kept_for_the_conclusion():
+    history = DialogHistory(SYSTEM_PROMPT, token_budget=7000, max_output_chars=1000)
+    history.append("user", "삼성전자 외국인 순매수 추이 알려줘", pin=True)
+    table = "날짜 외국인 기관 개인\n" * 200  # 한글 표 2400자 이상
+    history.append_execution("```python\nprint(df)\n```", table)
+    history.append("user", FEEDBACK)
+
+    latest = history.messages()[2]["content"]
+    assert "output omitted" not in latest
+    assert "날짜 외국인 기관 개인" in latest
+    assert roles(history) == ["system", "user", "assistant", "user"]
+
+
+def test_latest_execution_survives_even_over_budget():
+    history = DialogHistory(SYSTEM_PROMPT, token_budget=5000, max_output_chars=1000)
+    history.append("user", "질문", pin=True)
+    history.append_execution("code", "가" * 2400)
+    history.append("user", FEEDBACK)
+
+    assert history.total_tokens() > 5000
+    assert history.compacted == 0 and history.dropped == 0
+    assert roles(history) == ["system", "user", "assistant", "user"]
+
+
+def test_older_turns_are_compacted_then_dropped_in_pairs():
+    history = DialogHistory("sys", token_budget=300, max_output_chars=300)
+    history.append("user", "질문", pin=True)
+    for i in range(4):
+        history.append_execution(f"code {i}", "x" * 5000)
+        history.append("user", FEEDBACK)
+
+    messages = history.messages()
+    assert messages[1]["content"] == "질문"
+    assert messages[-2]["content"].startswith("code 3")
+    assert "output omitted" not in messages[-2]["content"]
+    assert history.total_tokens() <= 300
+    assert history.dropped % 2 == 0
+    # 피드백 메시지는 항상 자신의 실행 턴 바로 뒤에 남음
+    assert roles(history)[2:] == ["assistant", "user"] * ((len(messages) - 2) // 2)
+
+
+def test_compacted_turn_reports_original_size():
+    history = DialogHistory("sys", token_budget=200, max_output_chars=300)
+    history.append("user", "질문", pin=True)
+    history.append_execution("code 0", "x" * 5000)
+    history.append("user", FEEDBACK)
+    history.append_execution("code 1", "y" * 100)
+
+    assert "[output omitted: 5000 chars]" in history.messages()[2]["content"]
+    assert [turn["compacted"] for turn in history.turn_tokens()] == [False, False, True, False, False]
+
+
+def test_agent_history_drops_oldest_exchange():
+    history = DialogHistory("s", token_budget=60, max_output_chars=10)
+    for i in range(5):
+        history.append("user", f"q{i} " + "q" * 30)
+        history.append("assistant", f"a{i} " + "a" * 30)
+
+    messages = history.messages()
+    assert roles(history) == ["system", "user", "assistant"]
+    assert messages[1]["content"].startswith("q4")
+    assert history.stats()["history_dropped"] == 8
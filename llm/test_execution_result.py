@@ -0,0 +1,41 @@
+import json
+
+from execution_result import parse_execution_events
+
+
+def events(*items):
+    return [json.dumps(item) for item in items]
+
+
+def test_stdout_then_done():
+    lines = events(
+        {"type": "stdout", "text": "45\n"},
+        {"type": "done", "result_type": "text", "result": "45\n", "realtime": True},
+    )
+    assert parse_execution_events(lines) == ("45\n", None, False, True)
+
+
+def test_error_event_returns_early_as_failed():
+    lines = events(
+        {"type": "error", "text": "Traceback ..."},
+        {"type": "stdout", "text": "never read"},
+    )
+    output = parse_execution_events(lines)
+    assert output.failed and output.text == "Traceback ..."
+
+
+def test_done_with_error_type_is_failed():
+    lines = events({"type": "done", "result_type": "error", "result": None})
+    assert parse_execution_events(lines).failed
+
+
+def test_every_image_is_reported_and_last_is_returned():
+    seen = []
+    lines = events(
+        {"type": "image", "mime": "image/png", "data": "first"},
+        {"type": "image", "mime": "image/png", "data": "last"},
+        {"type": "done", "result_type": "image/png", "result": None},
+    )
+    output = parse_execution_events(lines, on_image=seen.append)
+    assert seen == ["first", "last"]
+    assert output.image == "last" and not output.failed
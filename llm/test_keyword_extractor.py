@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from keyword_extractor import KeywordExtractor, load_alias_index
+
+
+@pytest.fixture(scope="module")
+def index():
+    return load_alias_index("stock_aliases.csv")
+
+
+def name_of(index, text: str):
+    listing = index.lookup(text)
+    return listing.name if listing else None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("삼성전자 10년 종가 그래프 그려줘", "삼성전자"),
+        ("삼성전자주가 알려줘", "삼성전자"),
+        ("삼전 주가", "삼성전자"),
+        ("한전의 실적은?", "한국전력"),
+        ("한전 주가", "한국전력"),
+        ("LG전자 실적", "LG전자"),
+        ("lg 주가", "LG"),
+        ("KOSPI200 지수", "KOSPI 200"),
+        ("코스피 200 지수 그래프", "KOSPI 200"),
+        ("SK하이닉스와 삼성전자 비교", "SK하이닉스"),
+    ],
+)
+def test_lookup_finds_leftmost_longest(index, text, expected):
+    assert name_of(index, text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "안전한전략을 알려줘",  # "한전"이 단어 안에 있음
+        "삼바 춤 배우기",  # 삼바는 별칭에서 제외
+        "엔씨에게 물어봐",
+        "the task is done",  # "sk"
+        "오늘 날씨 어때",
+    ],
+)
+def test_lookup_rejects_aliases_inside_words(index, text):
+    assert name_of(index, text) is None
+
+
+def test_extractor_tiers(index):
+    llm_calls = []
+
+    async def llm_extract(message):
+        llm_calls.append(message)
+        return "키워드"
+
+    extractor = KeywordExtractor(index, cache_size=1)
+
+    async def run():
+        return [
+            await extractor.extract("삼성전자 주가", llm_extract),
+            await extractor.extract("금리 전망", llm_extract),
+            await extractor.extract("금리  전망", llm_extract),
+            await extractor.extract("환율 전망", llm_extract),
+            await extractor.extract("금리 전망", llm_extract),
+        ]
+
+    assert asyncio.run(run()) == ["삼성전자", "키워드", "키워드", "키워드", "키워드"]
+    # 캐시 크기 1: "환율 전망"이 "금리 전망"을 밀어냄
+    assert llm_calls == ["금리 전망", "환율 전망", "금리 전망"]
+    assert extractor.stats()["counts"] == {"local": 1, "cache": 1, "llm": 3}
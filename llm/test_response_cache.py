@@ -0,0 +1,99 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, char_ngrams, normalize_message
+
+
+def response(text="45", image=None, error=False, realtime=False):
+    result = SimpleNamespace(text=text, image=image, error=error, realtime=realtime)
+    return SimpleNamespace(
+        generated_code="print(45)",
+        code_exec_result=result,
+        model_dump_json=lambda: json.dumps({"text": text, "image": image}),
+    )
+
+
+def entity_of(key: str):
+    return next((name for name in ("삼성전자", "sk하이닉스") if name in key), None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(clock):
+    return ResponseCache(
+        max_bytes=10_000, max_entry_bytes=1_000, ttl=1800, realtime_ttl=60, similarity=0.5, entity_of=entity_of
+    )
+
+
+def test_normalize_message():
+    assert normalize_message("  삼성전자   종가 알려줘?! ") == "삼성전자 종가 알려줘"
+
+
+def test_char_ngrams_are_per_word():
+    assert char_ngrams("ab cd") == {"ab": 1, "cd": 1}
+
+
+def test_exact_hit_ignores_punctuation(cache):
+    cache.put("삼성전자 종가 알려줘", response())
+    assert cache.get("삼성전자 종가 알려줘!") is not None
+    assert cache.stats()["hits"] == 1
+
+
+def test_failed_execution_is_not_cached(cache):
+    cache.put("삼성전자 종가 알려줘", response(text="Traceback (most recent call last): ...", error=True))
+    assert cache.get("삼성전자 종가 알려줘") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_empty_result_is_not_cached(cache):
+    cache.put("삼성전자 종가 알려줘", response(text=""))
+    assert cache.stats()["entries"] == 0
+
+
+def test_realtime_answer_uses_short_ttl(cache, clock):
+    cache.put("삼성전자 현재가 알려줘", response(realtime=True))
+    cache.put("삼성전자 10년 종가 그래프", response())
+    clock[0] += 61
+
+    assert cache.get("삼성전자 현재가 알려줘") is None
+    assert cache.get("삼성전자 10년 종가 그래프") is not None
+
+
+def test_similar_question_needs_same_entity_and_numbers(cache):
+    cache.put("삼성전자 10년 종가 그래프 그려줘", response())
+
+    assert cache.get("삼성전자 10년 종가 그래프 보여줘") is not None
+    assert cache.get("SK하이닉스 10년 종가 그래프 그려줘") is None
+    assert cache.get("삼성전자 5년 종가 그래프 그려줘") is None
+
+
+def test_expired_best_match_does_not_hide_a_valid_one(cache, clock):
+    # 더 비슷하지만 만료된 항목 대신 유효한 항목을 찾아야 함
+    cache.put("삼성전자 10년 종가 그래프 그려줘", response(text="fresh"))
+    cache.put("삼성전자 10년 종가 그래프 그려줘요", response(text="stale", realtime=True))
+    clock[0] += 61
+
+    hit = cache.get("삼성전자 10년 종가 그래프 그려줘요 부탁")
+    assert hit is not None and hit.code_exec_result.text == "fresh"
+
+
+def test_size_bound_evicts_oldest(clock):
+    cache = ResponseCache(max_bytes=100, max_entry_bytes=80, ttl=60, realtime_ttl=60)
+    cache.put("a", response(text="x" * 40))
+    cache.put("b", response(text="y" * 40))
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.stats()["bytes"] <= 100
+
+    cache.put("c", response(text="z" * 100))
+    assert cache.get("c") is None
@@ -0,0 +1,115 @@
+import textwrap
+
+import pytest
+
+import system_prompt
+from system_prompt import SystemPrompt, load_method_docs, load_system_prompt
+
+SOURCE = textwrap.dedent(
+    '''
+    BATCH_CONCURRENCY = config("LS_BATCH_CONCURRENCY", default=5, cast=int)
+    PAGE_SIZE = 20
+
+
+    class LSFetcher(BaseFetcher):
+        def get_today_stock_price(self, shcode: str) -> int:
+            """
+            Retrieves the current price of a given stock.
+
+            Returns:
+                int: The current price.
+            """
+
+        def get_today_stock_infos_many(self, shcodes, concurrency: int = BATCH_CONCURRENCY, size=PAGE_SIZE, other=UNKNOWN):
+            """
+            Retrieves several stocks at once.
+
+            Returns:
+                List[Dict]: One entry per stock code.
+            """
+
+        def get_stock_chart_frame(self, shcode: str, ncnt: int):
+            """
+            Retrieves the stock chart.
+
+            Returns:
+                pandas.DataFrame: The chart.
+            """
+
+        def get_undocumented(self):
+            pass
+
+        def helper(self):
+            """Not a get_ method."""
+    '''
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "LSFetcher.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    monkeypatch.setattr(system_prompt, "_encoding", False)
+
+
+def test_only_documented_get_methods_in_source_order(source):
+    names = [doc.name for doc in load_method_docs(source)]
+    assert names == ["get_today_stock_price", "get_today_stock_infos_many", "get_stock_chart_frame"]
+
+
+def test_module_constants_are_rendered_as_literals(source):
+    text = load_method_docs(source)[1].text
+    assert "concurrency: int=5" in text
+    assert "size=20" in text
+    assert "other=..." in text
+    assert "BATCH_CONCURRENCY" not in text and "UNKNOWN" not in text
+
+
+def test_docstrings_are_not_indented(source):
+    text = load_method_docs(source)[0].text
+    assert '"""\nRetrieves the current price of a given stock.\n' in text
+
+
+def test_full_prompt_is_stable_prefix(source):
+    prompt = SystemPrompt("HEADER", load_method_docs(source))
+    assert prompt.full.startswith("HEADER\n\n\n")
+    assert prompt.full == SystemPrompt("HEADER", load_method_docs(source)).full
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("삼성전자 현재가 알려줘", ["get_today_stock_price", "get_today_stock_infos_many"]),
+        ("삼성전자 10년 종가 그래프", ["get_stock_chart_frame"]),
+    ],
+)
+def test_retrieval_selects_matching_methods(source, question, expected):
+    prompt = SystemPrompt("HEADER", load_method_docs(source))
+    text = prompt.for_question(question)
+    for doc in prompt.docs:
+        assert (f"def {doc.name}(" in text) == (doc.name in expected)
+
+
+@pytest.mark.parametrize("question", ["10년 동안 가장 많이 오른 업종은?", "what is the upper bound?"])
+def test_generic_words_do_not_trigger_retrieval(source, question):
+    # "년", "per" 같은 흔한 단어로는 문서를 고르지 않음 (전체 프롬프트로 대체)
+    prompt = SystemPrompt("HEADER", load_method_docs(source))
+    assert prompt.for_question(question) == prompt.full
+
+
+def test_missing_source_uses_fallback_file(tmp_path):
+    fallback = tmp_path / "prompt.txt"
+    fallback.write_text("FALLBACK", encoding="utf-8")
+    prompt = load_system_prompt(str(tmp_path / "missing.py"), str(fallback))
+    assert prompt.full == "FALLBACK"
+    assert prompt.for_question("삼성전자 현재가") == "FALLBACK"
+
+
+def test_token_counts_are_none_without_tokenizer():
+    assert system_prompt.count_tokens("hello") is None
+    assert system_prompt.count_message_tokens([{"role": "user", "content": "hello"}]) is None